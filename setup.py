@@ -18,6 +18,7 @@ setup(
     entry_points={
         'console_scripts': [
             'github-merge-assistant=main:main',
+            'github-merge-assistant-batch=cli:main',
         ],
     },
 )
\ No newline at end of file
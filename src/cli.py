@@ -0,0 +1,150 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.config.config_manager import ConfigManager
+
+# Analyses run at the same time
+DEFAULT_WORKERS = 4
+
+def read_jobs(stream):
+    """Parse one {"repo", "source", "target"} job per line, skipping blank lines"""
+    jobs = []
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        job = json.loads(line)
+        missing = [key for key in ('repo', 'source', 'target') if not job.get(key)]
+        if missing:
+            raise ValueError(f"line {number}: missing {', '.join(missing)}")
+        jobs.append(job)
+    return jobs
+
+def summarize(result):
+    """The JSON-friendly part of an analysis result, without file contents"""
+    return {
+        'has_conflicts': result['has_conflicts'],
+        'commit_count': result['commit_count'],
+        'total_additions': result['total_additions'],
+        'total_deletions': result['total_deletions'],
+        'changed_files': [{
+            'filename': file['filename'],
+            'status': file['status'],
+            'additions': file['additions'],
+            'deletions': file['deletions'],
+            'conflict': (file.get('conflict') or {}).get('type'),
+            'skip_reason': file.get('skip_reason')
+        } for file in result['changed_files']],
+        'ai_analysis': result['ai_analysis']
+    }
+
+def run_job(job, args, analysis_class, github_session, gemini_api_key, log):
+    """Run one analysis to completion on the calling thread and return its JSONL record"""
+    record = {'repo': job['repo'], 'source': job['source'], 'target': job['target']}
+    started = time.perf_counter()
+    options = {} if args.context_lines is None else {'context_lines': args.context_lines}
+    analysis = analysis_class(
+        github_session,
+        gemini_api_key,
+        job['repo'],
+        job['source'],
+        job['target'],
+        per_file_analysis=args.per_file,
+        patch_first=args.patch_first,
+        **options
+    )
+    outcome = {}
+    analysis.analysis_completed.connect(lambda result: outcome.update(result=result))
+    analysis.error_occurred.connect(lambda message: outcome.update(error=message))
+    if args.verbose:
+        analysis.progress_update.connect(lambda message: log(f"{job['repo']} {job['source']}: {message}"))
+    analysis.run()
+
+    if 'result' in outcome:
+        record['status'] = 'ok'
+        record.update(summarize(outcome['result']))
+    else:
+        record['status'] = 'error'
+        record['error'] = outcome.get('error', 'analysis produced no result')
+    record['elapsed'] = round(time.perf_counter() - started, 3)
+    return record
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='github-merge-assistant-batch',
+        description="Analyze merges without the GUI. Reads one JSON job per line, "
+                    "{\"repo\": \"owner/name\", \"source\": \"branch\", \"target\": \"branch\"}, "
+                    "and writes one JSON result per line as each job finishes."
+    )
+    parser.add_argument('jobs', nargs='?', default='-', help="JSONL job file, - for stdin (default)")
+    parser.add_argument('-o', '--output', default='-', help="JSONL result file, - for stdout (default)")
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS, help="analyses run in parallel")
+    parser.add_argument('--backend', choices=('github', 'mirror'), default='github',
+                        help="read changes from the GitHub API or a local mirror")
+    parser.add_argument('--per-file', action='store_true', help="analyze every changed file on its own")
+    parser.add_argument('--patch-first', action='store_true',
+                        help="send only the patches to the model, fetching full files it asks for")
+    parser.add_argument('--context-lines', type=int,
+                        help="context lines around changes in patch-first patches, mirror backend only")
+    parser.add_argument('--no-ai', action='store_true', help="skip the Gemini review")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log progress to stderr")
+    args = parser.parse_args(argv)
+
+    if args.context_lines is not None and args.backend != 'mirror':
+        parser.error("--context-lines needs --backend mirror, GitHub patches always have 3 lines of context")
+
+    config = ConfigManager()
+    if not config.github_token:
+        parser.error("no GitHub token, set GITHUB_TOKEN or configure one in the GUI")
+    gemini_api_key = None if args.no_ai else config.gemini_api_key
+
+    if args.jobs == '-':
+        jobs = read_jobs(sys.stdin)
+    else:
+        with open(args.jobs) as f:
+            jobs = read_jobs(f)
+
+    # Imported only once the arguments are valid so --help and usage errors stay instant
+    from src.services.github_session import get_github_session
+    if args.backend == 'mirror':
+        from src.services.local_mirror_analysis import LocalMirrorAnalysis as analysis_class
+    else:
+        from src.services.merge_analysis import MergeAnalysis as analysis_class
+    github_session = get_github_session(config.github_token)
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    output_lock = threading.Lock()
+    failed = 0
+
+    def log(message):
+        with output_lock:
+            print(message, file=sys.stderr, flush=True)
+
+    def run_one(job):
+        try:
+            return run_job(job, args, analysis_class, github_session, gemini_api_key, log)
+        except Exception as e:
+            return {'repo': job['repo'], 'source': job['source'], 'target': job['target'],
+                    'status': 'error', 'error': str(e)}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            # Stream each record as soon as its job is done
+            for future in as_completed([pool.submit(run_one, job) for job in jobs]):
+                record = future.result()
+                failed += record['status'] != 'ok'
+                with output_lock:
+                    output.write(json.dumps(record) + "\n")
+                    output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
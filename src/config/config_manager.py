@@ -1,11 +1,23 @@
 import os
 import json
+import sys
+
+# Optional features, all switched on the setup page; keys are MainPage arguments
+DEFAULT_OPTIONS = {
+    'branch_backend': 'rest',
+    'analysis_backend': 'github',
+    'per_file_analysis': False,
+    'patch_first': False,
+    'ahead_behind': False
+}
 
 class ConfigManager:
     def __init__(self):
         self.config_path = os.path.expanduser("~/.github_merge_assistant.json")
         self.github_token = os.environ.get("GITHUB_TOKEN", "")
         self.gemini_api_key = os.environ.get("GEMINI_API_KEY", "")
+        self.options = dict(DEFAULT_OPTIONS)
+        self.saved = {}
         self.load_config()
 
     def load_config(self):
@@ -14,23 +26,34 @@ class ConfigManager:
             try:
                 with open(self.config_path, 'r') as f:
                     config = json.load(f)
+                    self.saved = config
                     self.github_token = config.get('github_token', self.github_token)
                     self.gemini_api_key = config.get('gemini_api_key', self.gemini_api_key)
+                    for name, value in config.get('options', {}).items():
+                        if name in DEFAULT_OPTIONS:
+                            self.options[name] = value
             except Exception as e:
-                print(f"Error loading config: {e}")
+                print(f"Error loading config: {e}", file=sys.stderr)
 
     def save_config(self, github_token, gemini_api_key):
         """Save current configuration to file"""
         self.github_token = github_token
         self.gemini_api_key = gemini_api_key
+        self.saved['github_token'] = github_token
+        self.saved['gemini_api_key'] = gemini_api_key
+        return self.write()
+
+    def save_options(self, options):
+        """Save the feature options, without touching saved credentials"""
+        self.options.update(options)
+        self.saved['options'] = dict(self.options)
+        return self.write()
 
+    def write(self):
         try:
             with open(self.config_path, 'w') as f:
-                json.dump({
-                    'github_token': github_token,
-                    'gemini_api_key': gemini_api_key
-                }, f)
+                json.dump(self.saved, f)
             return True
         except Exception as e:
-            print(f"Error saving config: {e}")
-            return False
\ No newline at end of file
+            print(f"Error saving config: {e}", file=sys.stderr)
+            return False
@@ -0,0 +1,30 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from src.services.commit_graph import get_commit_graph
+
+class AheadBehindLoader(QThread):
+    """Indexes the branch heads in the commit graph and counts ahead/behind of every branch against a target"""
+    counts_loaded = pyqtSignal(str, list)  # target branch, [(ahead, behind)] in branch order
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, mirror, branches, target_branch):
+        super().__init__()
+        self.mirror = mirror
+        self.branches = branches  # [(name, head sha)]
+        self.target_branch = target_branch
+
+    def run(self):
+        try:
+            self.mirror.update()
+            graph = get_commit_graph(self.mirror.repo_full_name)
+            graph.update_from_mirror(self.mirror, [sha for _, sha in self.branches])
+
+            target_sha = dict(self.branches)[self.target_branch]
+            counts = []
+            for _, sha in self.branches:
+                if sha in graph:
+                    counts.append(graph.ahead_behind(sha, target_sha))
+                else:
+                    counts.append((-1, -1))
+            self.counts_loaded.emit(self.target_branch, counts)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.github_merge_assistant_cache/analysis")
+
+class AnalysisCache:
+    """
+    Persistent store of per-file AI findings.
+
+    Entries are keyed by (base blob SHA, head blob SHA, prompt version, model
+    name), so a finding is reused whenever the same file change is analysed
+    again with the same prompt and model, whichever branch it comes from.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, key):
+        digest = hashlib.sha256("\n".join(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".json")
+
+    def get(self, key):
+        try:
+            with open(self.path_for(key), 'r') as f:
+                finding = json.load(f)['finding']
+        except (OSError, ValueError, KeyError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return finding
+
+    def put(self, key, finding):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'key': list(key), 'finding': finding}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing analysis cache: {e}", file=sys.stderr)
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_analysis_cache():
+    """Return the process-wide analysis cache shared by all analyzers"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = AnalysisCache()
+        return _shared_cache
@@ -0,0 +1,171 @@
+import base64
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from src.services.rate_limiter import bulk_requests
+
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.github_merge_assistant_cache/blobs")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+class BlobCache:
+    """
+    Persistent content-addressed store for Git blobs.
+
+    Blobs are keyed by their SHA, which never changes for a given content, so a
+    cached blob is always valid and never needs a network round trip. The store
+    is bounded by max_bytes and evicts the least recently used blobs first.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # sha -> size, least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.load_index()
+
+    def load_index(self):
+        """Rebuild the LRU index from the files on disk, oldest access first"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        found = []
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(prefix_dir, name))
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, name, stat.st_size))
+
+        found.sort()
+        for _, sha, size in found:
+            self.entries[sha] = size
+            self.total_bytes += size
+        self.evict()
+
+    def path_for(self, sha):
+        return os.path.join(self.cache_dir, sha[:2], sha)
+
+    def get(self, sha):
+        """Return the cached blob bytes or None"""
+        with self.lock:
+            if sha not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(sha)
+            self.hits += 1
+
+        path = self.path_for(sha)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # The modification time records recency across restarts
+            os.utime(path)
+            return data
+        except OSError:
+            with self.lock:
+                self.forget(sha)
+            return None
+
+    def put(self, sha, data):
+        path = self.path_for(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing blob cache: {e}", file=sys.stderr)
+            return
+
+        with self.lock:
+            self.forget(sha)
+            self.entries[sha] = len(data)
+            self.total_bytes += len(data)
+            self.evict()
+
+    def forget(self, sha):
+        size = self.entries.pop(sha, None)
+        if size is not None:
+            self.total_bytes -= size
+
+    def evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            sha, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self.path_for(sha))
+            except OSError:
+                pass
+
+    def fetch(self, repo, sha):
+        """Return blob bytes from the cache, downloading them through the blob endpoint on a miss"""
+        data = self.get(sha)
+        if data is None:
+            # Content downloads yield to interactive requests sharing the token
+            with bulk_requests():
+                blob = repo.get_git_blob(sha)
+            if blob.encoding == 'base64':
+                data = base64.b64decode(blob.content)
+            else:
+                data = blob.content.encode('utf-8')
+            self.put(sha, data)
+        return data
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'blobs': len(self.entries),
+                'bytes': self.total_bytes
+            }
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_blob_cache():
+    """Return the process-wide blob cache shared by all services"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = BlobCache()
+        return _shared_cache
+
+def get_tree_blobs(repo, ref, sizes=None):
+    """
+    Map every file path in the tree of ref to its blob SHA.
+    The second value is True when GitHub truncated the listing.
+    When a sizes dict is given, it is filled with the size of every blob by SHA.
+    """
+    tree = repo.get_git_tree(ref, recursive=True)
+    blobs = {}
+    for entry in tree.tree:
+        if entry.type == 'blob':
+            blobs[entry.path] = entry.sha
+            if sizes is not None:
+                sizes[entry.sha] = entry.size
+    return blobs, bool(getattr(tree, 'raw_data', {}).get('truncated'))
+
+def open_raw(github_session, path, params=None):
+    """
+    Start a streamed download of a blob or contents endpoint as raw bytes,
+    without the base64 JSON envelope or its 1 MB limit. Returns the response.
+    """
+    with bulk_requests():
+        response = github_session.request(
+            'GET', path, params=params, headers={'Accept': 'application/vnd.github.raw'}, stream=True
+        )
+    if not response.ok:
+        response.close()
+        response.raise_for_status()
+    return response
@@ -0,0 +1,19 @@
+class Callback:
+    """
+    Qt-free stand-in for pyqtSignal used by the headless services.
+    emit() calls every connected function on the emitting thread.
+    """
+
+    def __init__(self):
+        self.handlers = []
+
+    def connect(self, handler):
+        self.handlers.append(handler)
+
+    def disconnect(self):
+        """Disconnect every handler, like pyqtSignal.disconnect() without arguments"""
+        self.handlers = []
+
+    def emit(self, *args):
+        for handler in self.handlers:
+            handler(*args)
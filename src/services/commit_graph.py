@@ -0,0 +1,150 @@
+import heapq
+import threading
+from array import array
+
+class CommitGraph:
+    """
+    Compact in-memory index of a repository's commit history.
+
+    Commits are numbered in the order they are added (parents first); parent
+    links are stored as CSR-style offset/index arrays and every commit gets a
+    generation number (1 + the highest parent generation). Walks visit commits
+    in decreasing generation and stop as soon as the answer is settled, so
+    merge-base and ahead/behind queries only touch the diverged part of history.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.positions = {}
+        self.shas = bytearray()
+        self.generations = array('I')
+        self.parent_offsets = array('I', [0])
+        self.parent_indices = array('I')
+        self.tips = set()
+
+    def __len__(self):
+        return len(self.generations)
+
+    def __contains__(self, sha):
+        return bytes.fromhex(sha) in self.positions
+
+    def sha(self, position):
+        return self.shas[position * 20:(position + 1) * 20].hex()
+
+    def parents(self, position):
+        return self.parent_indices[self.parent_offsets[position]:self.parent_offsets[position + 1]]
+
+    def add_commits(self, commits):
+        """Add (sha, [parent shas]) records, parents before children; already indexed commits are skipped"""
+        with self.lock:
+            for sha, parent_shas in commits:
+                key = bytes.fromhex(sha)
+                if key in self.positions:
+                    continue
+                parents = [self.positions[bytes.fromhex(parent)] for parent in parent_shas]
+                self.positions[key] = len(self.generations)
+                self.shas += key
+                self.generations.append(1 + max((self.generations[p] for p in parents), default=0))
+                self.parent_indices.extend(parents)
+                self.parent_offsets.append(len(self.parent_indices))
+
+    def update_from_mirror(self, mirror, heads):
+        """Index the history of heads, reading only commits not reachable from heads indexed before"""
+        heads = [head for head in dict.fromkeys(heads) if head not in self]
+        if not heads:
+            return 0
+        with self.lock:
+            known = list(self.tips)
+
+        request = "\n".join(heads + ["^" + tip for tip in known]) + "\n"
+        output = mirror.git(
+            'rev-list', '--topo-order', '--reverse', '--parents', '--ignore-missing', '--stdin',
+            input=request.encode()
+        )
+        commits = []
+        for line in output.decode().splitlines():
+            shas = line.split()
+            if shas:
+                commits.append((shas[0], shas[1:]))
+
+        self.add_commits(commits)
+        with self.lock:
+            self.tips.update(heads)
+        return len(commits)
+
+    def walk(self, first, second):
+        """
+        Paint commits reachable from first (flag 1) and second (flag 2) in
+        decreasing generation until only commits reachable from both remain.
+        Returns the number of commits reachable from only one side each.
+        """
+        flags = {first: 1}
+        flags[second] = flags.get(second, 0) | 2
+        heap = [(-self.generations[c], c) for c in flags]
+        heapq.heapify(heap)
+        pending = sum(1 for flag in flags.values() if flag != 3)
+
+        ahead = behind = 0
+        while heap and pending:
+            _, commit = heapq.heappop(heap)
+            flag = flags[commit]
+            if flag != 3:
+                pending -= 1
+                if flag == 1:
+                    ahead += 1
+                else:
+                    behind += 1
+
+            for parent in self.parents(commit):
+                old = flags.get(parent)
+                if old is None:
+                    flags[parent] = flag
+                    heapq.heappush(heap, (-self.generations[parent], parent))
+                    if flag != 3:
+                        pending += 1
+                elif old | flag != old:
+                    # Parents are always queued after their children, so this one is still waiting
+                    flags[parent] = old | flag
+                    if old | flag == 3:
+                        pending -= 1
+
+        return ahead, behind
+
+    def ahead_behind(self, sha, base_sha):
+        """Commits in sha that are not in base_sha, and the other way round"""
+        return self.walk(self.positions[bytes.fromhex(sha)], self.positions[bytes.fromhex(base_sha)])
+
+    def merge_base(self, first_sha, second_sha):
+        """A best common ancestor of the two commits, or None for unrelated histories"""
+        first = self.positions[bytes.fromhex(first_sha)]
+        second = self.positions[bytes.fromhex(second_sha)]
+        if first == second:
+            return first_sha
+        flags = {first: 1, second: 2}
+        heap = [(-self.generations[first], first), (-self.generations[second], second)]
+        heapq.heapify(heap)
+        while heap:
+            _, commit = heapq.heappop(heap)
+            flag = flags[commit]
+            if flag == 3:
+                return self.sha(commit)
+            for parent in self.parents(commit):
+                old = flags.get(parent)
+                if old is None:
+                    flags[parent] = flag
+                    heapq.heappush(heap, (-self.generations[parent], parent))
+                else:
+                    flags[parent] = old | flag
+        return None
+
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+def get_commit_graph(repo_full_name):
+    """Return the process-wide commit graph of a repository"""
+    with _graphs_lock:
+        graph = _graphs.get(repo_full_name)
+        if graph is None:
+            graph = CommitGraph()
+            _graphs[repo_full_name] = graph
+        return graph
@@ -0,0 +1,317 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+
+# Stretches without unique lines are matched by difflib exactly while their
+# line counts multiply to at most this
+MAX_EXACT_CELLS = 250000
+# Larger ones get a Myers diff limited to this many line comparisons; past it
+# difflib ignores lines too common to anchor on, which keeps it from going quadratic
+MAX_MYERS_STEPS = 2000000
+# Bytes of blobs read per batch of files merged, only one batch is in memory at a time
+MERGE_BATCH_BYTES = 32 * 1024 * 1024
+# Files per batch, bounding batches of blobs whose size is unknown
+MERGE_BATCH_FILES = 256
+
+def _anchors(a, b, a_lo, a_hi, b_lo, b_hi):
+    """
+    Lines occurring exactly once in both ranges, as (a index, b index) pairs
+    forming the longest run that is in order on both sides
+    """
+    a_counts = Counter(a[a_lo:a_hi])
+    b_counts = Counter(b[b_lo:b_hi])
+    b_positions = {b[j]: j for j in range(b_lo, b_hi) if b_counts[b[j]] == 1}
+    pairs = [(i, b_positions[a[i]]) for i in range(a_lo, a_hi)
+             if a_counts[a[i]] == 1 and a[i] in b_positions]
+
+    # Longest increasing run of b indexes, by patience sorting
+    tails = []  # b index ending the best run of each length
+    tail_pairs = []
+    previous = []
+    for pair in pairs:
+        length = bisect_left(tails, pair[1])
+        if length == len(tails):
+            tails.append(pair[1])
+            tail_pairs.append(len(previous))
+        else:
+            tails[length] = pair[1]
+            tail_pairs[length] = len(previous)
+        previous.append((pair, tail_pairs[length - 1] if length else None))
+
+    anchors = []
+    index = tail_pairs[-1] if tail_pairs else None
+    while index is not None:
+        pair, index = previous[index]
+        anchors.append(pair)
+    anchors.reverse()
+    return anchors
+
+def _myers(a, b, a_lo, a_hi, b_lo, b_hi):
+    """
+    Matching blocks of a shortest edit script between two ranges, or None
+    once it takes more than MAX_MYERS_STEPS. Fast when the ranges differ in
+    few lines, however repetitive they are.
+    """
+    n, m = a_hi - a_lo, b_hi - b_lo
+    offset = n + m + 1
+    furthest = array('l', [0]) * (2 * offset + 1)  # furthest x on each diagonal k = x - y
+    trace = []  # the band of furthest each step started from
+    steps = 0
+    for d in range(n + m + 1):
+        trace.append(furthest[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and furthest[offset + k - 1] < furthest[offset + k + 1]):
+                x = furthest[offset + k + 1]
+            else:
+                x = furthest[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            steps += x - furthest[offset + k] + 1
+            furthest[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_blocks(trace, x, y, a_lo, b_lo)
+            if steps > MAX_MYERS_STEPS:
+                return None
+    return None
+
+def _myers_blocks(trace, x, y, a_lo, b_lo):
+    """Walk the trace of _myers back from (x, y), collecting the diagonal runs"""
+    blocks = []
+    for d in range(len(trace) - 1, -1, -1):
+        band = trace[d]  # band[i] is furthest on diagonal i - d - 1
+        k = x - y
+        if d == 0:
+            start_x = 0
+        else:
+            if k == -d or (k != d and band[k - 1 + d + 1] < band[k + 1 + d + 1]):
+                previous_k, start_x = k + 1, band[k + 1 + d + 1]
+            else:
+                previous_k = k - 1
+                start_x = band[k - 1 + d + 1] + 1
+        if x > start_x:
+            blocks.append((a_lo + start_x, b_lo + start_x - k, x - start_x))
+        if d:
+            x = band[previous_k + d + 1]
+            y = x - previous_k
+    return blocks
+
+def _matches(base, other):
+    """
+    Matching blocks of two line lists as (base_start, other_start, length),
+    ending with a sentinel, like SequenceMatcher.get_matching_blocks().
+
+    Lines are compared as interned numbers and aligned on the lines unique to
+    both sides first (patience diff), so repeated lines such as braces and
+    blank lines cannot make the match quadratic.
+    """
+    ids = {}
+    a = [ids.setdefault(line, len(ids)) for line in base]
+    b = [ids.setdefault(line, len(ids)) for line in other]
+
+    blocks = []
+    ranges = [(0, len(a), 0, len(b))]
+    while ranges:
+        a_lo, a_hi, b_lo, b_hi = ranges.pop()
+        # Common prefix and suffix
+        start = 0
+        while a_lo + start < a_hi and b_lo + start < b_hi and a[a_lo + start] == b[b_lo + start]:
+            start += 1
+        if start:
+            blocks.append((a_lo, b_lo, start))
+            a_lo += start
+            b_lo += start
+        end = 0
+        while a_hi - end > a_lo and b_hi - end > b_lo and a[a_hi - end - 1] == b[b_hi - end - 1]:
+            end += 1
+        if end:
+            blocks.append((a_hi - end, b_hi - end, end))
+            a_hi -= end
+            b_hi -= end
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        anchors = _anchors(a, b, a_lo, a_hi, b_lo, b_hi)
+        if anchors:
+            # Each anchor matches, the stretches between anchors are matched on their own
+            for i, j in anchors:
+                blocks.append((i, j, 1))
+                ranges.append((a_lo, i, b_lo, j))
+                a_lo, b_lo = i + 1, j + 1
+            ranges.append((a_lo, a_hi, b_lo, b_hi))
+        else:
+            exact = (a_hi - a_lo) * (b_hi - b_lo) <= MAX_EXACT_CELLS
+            found = None if exact else _myers(a, b, a_lo, a_hi, b_lo, b_hi)
+            if found is not None:
+                blocks += found
+                continue
+            matcher = SequenceMatcher(None, a[a_lo:a_hi], b[b_lo:b_hi], autojunk=not exact)
+            for i, j, length in matcher.get_matching_blocks():
+                if length:
+                    blocks.append((a_lo + i, b_lo + j, length))
+
+    # Join adjacent blocks, then end with the sentinel
+    matches = []
+    for i, j, length in sorted(blocks):
+        if matches and matches[-1][0] + matches[-1][2] == i and matches[-1][1] + matches[-1][2] == j:
+            matches[-1] = (matches[-1][0], matches[-1][1], matches[-1][2] + length)
+        else:
+            matches.append((i, j, length))
+    matches.append((len(a), len(b), 0))
+    return matches
+
+def sync_regions(base, ours, theirs):
+    """
+    Regions where base, ours and theirs all agree, as
+    (base_start, base_end, ours_start, ours_end, theirs_start, theirs_end),
+    ending with an empty sentinel region at the end of all three.
+    """
+    ours_matches = _matches(base, ours)
+    theirs_matches = _matches(base, theirs)
+
+    regions = []
+    i = j = 0
+    while i < len(ours_matches) and j < len(theirs_matches):
+        ours_base, ours_start, ours_length = ours_matches[i]
+        theirs_base, theirs_start, theirs_length = theirs_matches[j]
+
+        # Overlap of the two matching blocks on the base side
+        start = max(ours_base, theirs_base)
+        end = min(ours_base + ours_length, theirs_base + theirs_length)
+        if start < end:
+            ours_offset = ours_start + (start - ours_base)
+            theirs_offset = theirs_start + (start - theirs_base)
+            length = end - start
+            regions.append((start, end, ours_offset, ours_offset + length, theirs_offset, theirs_offset + length))
+
+        if ours_base + ours_length < theirs_base + theirs_length:
+            i += 1
+        else:
+            j += 1
+
+    regions.append((len(base), len(base), len(ours), len(ours), len(theirs), len(theirs)))
+    return regions
+
+def merge_lines(base, ours, theirs):
+    """
+    Three-way merge of three line lists.
+    Returns (merged_lines, conflicts) where each conflict holds the 1-based,
+    inclusive line ranges of the clashing hunk in base, ours and theirs.
+    """
+    merged = []
+    conflicts = []
+    base_position = ours_position = theirs_position = 0
+
+    for base_start, base_end, ours_start, ours_end, theirs_start, theirs_end in sync_regions(base, ours, theirs):
+        base_chunk = base[base_position:base_start]
+        ours_chunk = ours[ours_position:ours_start]
+        theirs_chunk = theirs[theirs_position:theirs_start]
+
+        if ours_chunk == theirs_chunk or theirs_chunk == base_chunk:
+            merged.extend(ours_chunk)
+        elif ours_chunk == base_chunk:
+            merged.extend(theirs_chunk)
+        else:
+            conflicts.append({
+                'base': (base_position + 1, base_start),
+                'target': (ours_position + 1, ours_start),
+                'source': (theirs_position + 1, theirs_start)
+            })
+            merged.extend(ours_chunk)
+
+        merged.extend(ours[ours_start:ours_end])
+        base_position, ours_position, theirs_position = base_end, ours_end, theirs_end
+
+    return merged, conflicts
+
+def is_binary(data):
+    return b'\0' in data[:8000]
+
+class ConflictDetector:
+    """
+    Content-level conflict detection for merging a source branch into a target.
+
+    For every file the source branch changed, the merge base, target and
+    source versions are compared by blob SHA first; only files changed on
+    both sides are downloaded and merged line by line, in batches of about
+    MERGE_BATCH_BYTES. The merges are pure Python and CPU bound, so they run
+    one after the other.
+    """
+
+    def __init__(self, read_blobs, blob_sizes=None):
+        # read_blobs(shas) -> {sha: bytes}
+        self.read_blobs = read_blobs
+        self.blob_sizes = blob_sizes or {}  # blob SHA -> size, where known
+
+    def classify(self, base_sha, target_sha, source_sha):
+        """Settle a file from its blob SHAs alone; returns a conflict type, None when clean, or 'merge'"""
+        if source_sha == target_sha or source_sha == base_sha or target_sha == base_sha:
+            return None
+        if source_sha is None or target_sha is None:
+            return 'modify/delete'
+        if base_sha is None:
+            return 'add/add' if source_sha != target_sha else None
+        return 'merge'
+
+    def merge_file(self, blobs, base_sha, target_sha, source_sha):
+        base = blobs.get(base_sha, b'') if base_sha else b''
+        target = blobs[target_sha]
+        source = blobs[source_sha]
+        if is_binary(base) or is_binary(target) or is_binary(source):
+            return 'binary', []
+
+        _, conflicts = merge_lines(
+            base.decode('utf-8', 'replace').splitlines(),
+            target.decode('utf-8', 'replace').splitlines(),
+            source.decode('utf-8', 'replace').splitlines()
+        )
+        if conflicts:
+            return 'content', conflicts
+        return None, []
+
+    def detect(self, changed_files, base_tree, target_tree, source_tree):
+        """
+        Return {filename: conflict} for the conflicting files among changed_files,
+        where conflict is {'type': ..., 'regions': [...]}.
+        """
+        conflicts = {}
+        to_merge = []
+        for file in changed_files:
+            path = file['filename']
+            base_path = file.get('previous_filename') or path
+            base_sha = base_tree.get(base_path)
+            target_sha = target_tree.get(path) or target_tree.get(base_path)
+            source_sha = source_tree.get(path)
+
+            kind = self.classify(base_sha, target_sha, source_sha)
+            if kind == 'merge' or kind == 'add/add':
+                to_merge.append((path, base_sha, target_sha, source_sha))
+            elif kind:
+                conflicts[path] = {'type': kind, 'regions': []}
+
+        if not to_merge:
+            return conflicts
+
+        batch = []
+        batch_bytes = 0
+        for item in to_merge:
+            batch.append(item)
+            batch_bytes += sum(self.blob_sizes.get(sha, 0) for sha in item[1:] if sha)
+            if batch_bytes >= MERGE_BATCH_BYTES or len(batch) >= MERGE_BATCH_FILES:
+                self.merge_batch(batch, conflicts)
+                batch = []
+                batch_bytes = 0
+        if batch:
+            self.merge_batch(batch, conflicts)
+
+        return conflicts
+
+    def merge_batch(self, batch, conflicts):
+        """Read the blobs of a batch of files, merge them and add their conflicts"""
+        blobs = self.read_blobs([sha for item in batch for sha in item[1:] if sha])
+        for path, base_sha, target_sha, source_sha in batch:
+            kind, regions = self.merge_file(blobs, base_sha, target_sha, source_sha)
+            if kind:
+                conflicts[path] = {'type': kind, 'regions': regions}
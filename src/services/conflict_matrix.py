@@ -0,0 +1,152 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+from PyQt5.QtCore import QThread, pyqtSignal
+from src.services.conflict_detector import ConflictDetector
+from src.services.local_mirror import LocalMirror
+from src.services.commit_graph import get_commit_graph
+
+# Branch pairs checked at the same time
+DEFAULT_MAX_WORKERS = 8
+# Git's well-known empty tree, the merge base of unrelated histories
+EMPTY_TREE_SHA = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+def suggest_merge_order(branches, matrix):
+    """
+    Order the source branches (branches[1:]) for sequential merging into the
+    target (branches[0]) so that as few merges as possible hit a conflict.
+
+    Greedily lands a branch that is clean against everything merged so far,
+    preferring the one that conflicts with the fewest branches still waiting;
+    branches that cannot land cleanly go last. Returns (order, conflicting merges).
+    """
+    merged = [0]
+    remaining = list(range(1, len(branches)))
+    order = []
+    conflicting = 0
+
+    def degree(index, others):
+        return sum(1 for other in others if other != index and matrix[index][other])
+
+    while remaining:
+        clean = [i for i in remaining if not any(matrix[i][m] for m in merged)]
+        candidates = clean or remaining
+        choice = min(candidates, key=lambda i: (degree(i, merged), degree(i, remaining), i))
+        if not clean:
+            conflicting += 1
+        order.append(branches[choice])
+        merged.append(choice)
+        remaining.remove(choice)
+
+    return order, conflicting
+
+class ConflictMatrixBuilder(QThread):
+    """
+    Checks every pair of selected source branches, and each source branch
+    against the target, for merge conflicts using the local mirror.
+
+    Merge bases come from the shared commit graph; per-base change lists and
+    blob contents are cached across pairs, so branches forked from the same
+    commit share almost all of the work. Only paths changed on both sides of a
+    pair are merged.
+    """
+    matrix_completed = pyqtSignal(dict)
+    error_occurred = pyqtSignal(str)
+    progress_update = pyqtSignal(str)
+
+    def __init__(self, github_session, repo_full_name, source_branches, target_branch,
+                 max_workers=DEFAULT_MAX_WORKERS, mirror=None):
+        super().__init__()
+        self.branches = [target_branch] + list(source_branches)
+        self.max_workers = max(1, max_workers)
+        self.mirror = mirror or LocalMirror(repo_full_name, github_session.github_token)
+        self.graph = get_commit_graph(self.mirror.repo_full_name)
+        self.lock = threading.Lock()
+        self.merge_bases = {}
+        self.changes = {}
+        self.blobs = {}
+
+    def merge_base(self, first, second):
+        key = (min(first, second), max(first, second))
+        with self.lock:
+            if key in self.merge_bases:
+                return self.merge_bases[key]
+        base = self.graph.merge_base(first, second) or EMPTY_TREE_SHA
+        with self.lock:
+            self.merge_bases[key] = base
+        return base
+
+    def changed(self, base, head):
+        key = (base, head)
+        with self.lock:
+            if key in self.changes:
+                return self.changes[key]
+        changes = self.mirror.changed_blobs(base, head)
+        with self.lock:
+            self.changes[key] = changes
+        return changes
+
+    def read_blobs(self, shas):
+        with self.lock:
+            missing = [sha for sha in shas if sha not in self.blobs]
+        fetched = self.mirror.read_blobs(missing)
+        with self.lock:
+            self.blobs.update(fetched)
+            return {sha: self.blobs[sha] for sha in shas if sha in self.blobs}
+
+    def conflicts_between(self, first_sha, second_sha):
+        """Sorted names of the files that conflict when merging the two commits"""
+        if first_sha == second_sha:
+            return []
+        base = self.merge_base(first_sha, second_sha)
+        first_changes = self.changed(base, first_sha)
+        second_changes = self.changed(base, second_sha)
+
+        changed_files = []
+        base_tree, first_tree, second_tree = {}, {}, {}
+        for path in first_changes.keys() & second_changes.keys():
+            base_tree[path], first_tree[path] = first_changes[path]
+            second_tree[path] = second_changes[path][1]
+            changed_files.append({'filename': path})
+
+        if not changed_files:
+            return []
+        detector = ConflictDetector(self.read_blobs)
+        return sorted(detector.detect(changed_files, base_tree, first_tree, second_tree))
+
+    def run(self):
+        try:
+            self.progress_update.emit("Updating local mirror...")
+            self.mirror.update()
+            shas = [self.mirror.resolve(branch) for branch in self.branches]
+            self.graph.update_from_mirror(self.mirror, shas)
+
+            count = len(self.branches)
+            matrix = [[None if i == j else [] for j in range(count)] for i in range(count)]
+            pairs = list(combinations(range(count), 2))
+            done = [0]
+
+            def check(pair):
+                i, j = pair
+                files = self.conflicts_between(shas[i], shas[j])
+                with self.lock:
+                    done[0] += 1
+                    if done[0] % 20 == 0 or done[0] == len(pairs):
+                        self.progress_update.emit(f"Checked {done[0]}/{len(pairs)} branch pairs...")
+                return pair, files
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for (i, j), files in pool.map(check, pairs):
+                    matrix[i][j] = files
+                    matrix[j][i] = files
+
+            order, conflicting = suggest_merge_order(self.branches, matrix)
+            self.matrix_completed.emit({
+                'branches': self.branches,
+                'matrix': matrix,
+                'merge_order': order,
+                'conflicting_merges': conflicting
+            })
+        except Exception as e:
+            self.error_occurred.emit(str(e))
@@ -0,0 +1,18 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+class ContentLoader(QThread):
+    """Fetches the contents of changed files a patch-first analysis left out, when the user opens them"""
+    contents_loaded = pyqtSignal(object)  # the changed files, with their contents set
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, load_contents, files):
+        super().__init__()
+        self.load_contents = load_contents  # the analysis result's load_contents
+        self.files = files
+
+    def run(self):
+        try:
+            self.load_contents(self.files)
+            self.contents_loaded.emit(self.files)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
@@ -0,0 +1,37 @@
+import os
+
+# Blobs larger than this are streamed raw instead of through the base64 blob API
+RAW_STREAM_THRESHOLD = 1024 * 1024
+# Files larger than this are not loaded whole, only their first SAMPLE_BYTES
+MAX_CONTENT_BYTES = 8 * 1024 * 1024
+SAMPLE_BYTES = 64 * 1024
+# Read size of raw streams
+RAW_CHUNK_BYTES = 64 * 1024
+# Like git, a NUL byte within the first BINARY_SNIFF_BYTES marks a blob as binary
+BINARY_SNIFF_BYTES = 8000
+
+# Files with these extensions are skipped without downloading them
+BINARY_EXTENSIONS = frozenset((
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.icns', '.webp', '.tif', '.tiff', '.psd',
+    '.mp3', '.mp4', '.mov', '.avi', '.wav', '.ogg', '.flac', '.webm',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.tar', '.jar', '.war', '.whl', '.egg',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    '.exe', '.dll', '.so', '.dylib', '.a', '.lib', '.o', '.obj', '.class', '.pyc', '.bin', '.dat',
+    '.sqlite', '.db', '.pkl', '.npy', '.npz', '.h5', '.onnx', '.pt'
+))
+
+# Skip reason of binary files
+BINARY = "binary file"
+
+def is_binary_path(path):
+    return os.path.splitext(path)[1].lower() in BINARY_EXTENSIONS
+
+def is_binary(data):
+    return b"\0" in data[:BINARY_SNIFF_BYTES]
+
+def sampled_reason(size):
+    return f"too large ({size} bytes), only the first {SAMPLE_BYTES} bytes were loaded"
+
+def truncated_reason(limit):
+    return f"too large, only the first {limit} bytes were loaded"
@@ -0,0 +1,136 @@
+import mmap
+import tempfile
+import threading
+
+# Block size for moving a growing range to the end of the file
+COPY_BYTES = 1024 * 1024
+
+class ContentHandle:
+    """Where one file content lives in a ContentStore. Loads it only when read."""
+    __slots__ = ('store', 'offset', 'length')
+
+    def __init__(self, store, offset, length):
+        self.store = store
+        self.offset = offset
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def read(self):
+        return self.store.read(self.offset, self.length)
+
+    def text(self):
+        return self.read().decode('utf-8', 'replace')
+
+class ContentStore:
+    """
+    Append-only spill file for the file contents of one analysis.
+
+    Contents are written to an anonymous temporary file as they are fetched
+    and read back through a memory map, so result dicts hold only small
+    ContentHandles and the OS decides which pages stay in memory. Contents
+    put with a key (a blob SHA) are stored once. The file is deleted when
+    the store and every handle into it are gone.
+    """
+
+    def __init__(self, directory=None):
+        self.file = tempfile.TemporaryFile(prefix='merge-assistant-content-', dir=directory)
+        self.lock = threading.Lock()
+        self.size = 0
+        self.map = None
+        self.mapped = 0
+        self.handles = {}  # key -> ContentHandle
+
+    def put(self, data, key=None):
+        """Store bytes and return their handle"""
+        with self.lock:
+            if key is not None and key in self.handles:
+                return self.handles[key]
+            handle = ContentHandle(self, self.size, len(data))
+            self.file.seek(self.size)
+            self.file.write(data)
+            # Handles may be read through the map right away, so nothing may stay buffered
+            self.file.flush()
+            self.size += len(data)
+            if key is not None:
+                self.handles[key] = handle
+            return handle
+
+    def put_chunks(self, chunks, length, key=None, reserve=None):
+        """
+        Store up to length bytes from an iterable of byte chunks, holding only
+        one chunk in memory. Space is reserved up front so several streams can
+        be written at the same time. With reserve, for streams whose length is
+        not known, only that much is reserved at first and the range grows as
+        the chunks come in.
+        """
+        with self.lock:
+            if key is not None and key in self.handles:
+                return self.handles[key]
+            capacity = min(length, reserve or length)
+            offset = self.reserve(capacity)
+
+        written = 0
+        for chunk in chunks:
+            chunk = chunk[:length - written]
+            with self.lock:
+                if written + len(chunk) > capacity:
+                    grown = min(length, max(capacity * 2, written + len(chunk)))
+                    offset, capacity = self.grow(offset, written, capacity, grown), grown
+                self.file.seek(offset + written)
+                self.file.write(chunk)
+            written += len(chunk)
+            if written >= length:
+                break
+
+        handle = ContentHandle(self, offset, written)
+        with self.lock:
+            self.file.flush()
+            if key is not None:
+                handle = self.handles.setdefault(key, handle)
+        return handle
+
+    def reserve(self, length):
+        """Reserve length bytes at the end of the file, with the lock held"""
+        offset = self.size
+        self.size += length
+        # Extend the file so the reserved range can always be mapped
+        self.file.truncate(self.size)
+        return offset
+
+    def grow(self, offset, written, capacity, grown):
+        """
+        Grow the range of capacity bytes at offset, of which the first written
+        are used, to grown bytes, with the lock held. Returns its new offset:
+        the last range grows in place, any other is moved to the end.
+        """
+        if offset + capacity == self.size:
+            self.reserve(grown - capacity)
+            return offset
+        new_offset = self.reserve(grown)
+        self.file.flush()
+        for start in range(0, written, COPY_BYTES):
+            self.file.seek(offset + start)
+            block = self.file.read(min(COPY_BYTES, written - start))
+            self.file.seek(new_offset + start)
+            self.file.write(block)
+        return new_offset
+
+    def put_text(self, text, key=None):
+        return self.put(text.encode('utf-8'), key)
+
+    def get(self, key):
+        with self.lock:
+            return self.handles.get(key)
+
+    def read(self, offset, length):
+        if not length:
+            return b""
+        with self.lock:
+            # Map again once writes went past the end of the current map
+            if offset + length > self.mapped:
+                self.map = mmap.mmap(self.file.fileno(), self.size, access=mmap.ACCESS_READ)
+                self.mapped = self.size
+            view = self.map
+        return view[offset:offset + length]
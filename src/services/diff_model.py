@@ -0,0 +1,151 @@
+import re
+from array import array
+
+# Kinds of diff lines
+PLAIN = 0
+ADDED = 1
+REMOVED = 2
+HUNK_HEADER = 3
+SECTION_HEADER = 4
+
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$")
+
+def classify_line(text):
+    """Kind of one diff line"""
+    if text.startswith("@@") and text.find("@@", 2) > 0:
+        return HUNK_HEADER
+    if text.startswith("+"):
+        return ADDED
+    if text.startswith("-"):
+        return REMOVED
+    if text.startswith("=== "):
+        return SECTION_HEADER
+    return PLAIN
+
+class LineBuffer:
+    """
+    Lines of one string, addressed by index through a table of line start
+    offsets, with a kind per line. Lines are sliced out only when read.
+    Without classify, every line is PLAIN, for file contents.
+    """
+
+    def __init__(self, text="", classify=True):
+        self.text = text
+        self.offsets = array('Q')
+        self.kinds = bytearray()
+        self.widest = 0
+        # A trailing newline ends the last line instead of starting an empty one
+        lines = text.split("\n")
+        if lines and lines[-1] == "":
+            lines.pop()
+        position = 0
+        for line in lines:
+            self.offsets.append(position)
+            self.kinds.append(classify_line(line) if classify else PLAIN)
+            self.widest = max(self.widest, len(line))
+            position += len(line) + 1
+
+    def line_count(self):
+        return len(self.offsets)
+
+    def line(self, index):
+        start = self.offsets[index]
+        if index + 1 < len(self.offsets):
+            return self.text[start:self.offsets[index + 1] - 1]
+        end = self.text.find("\n", start)
+        return self.text[start:end if end >= 0 else len(self.text)]
+
+    def kind(self, index):
+        return self.kinds[index]
+
+    def span(self, first, end):
+        """Text of lines first to end (exclusive), as one slice"""
+        if first >= end:
+            return ""
+        stop = self.offsets[end] - 1 if end < len(self.offsets) else len(self.text) - self.text.endswith("\n")
+        return self.text[self.offsets[first]:stop]
+
+class DiffHunk:
+    __slots__ = ('old_start', 'old_count', 'new_start', 'new_count', 'section', 'first_line', 'end_line')
+
+    def __init__(self, match, first_line):
+        self.old_start = int(match.group(1))
+        self.old_count = int(match.group(2) or 1)
+        self.new_start = int(match.group(3))
+        self.new_count = int(match.group(4) or 1)
+        # The enclosing function or class git puts after the second @@
+        self.section = match.group(5)
+        self.first_line = first_line
+        self.end_line = first_line
+
+class DiffFile:
+    """One changed file: header lines and patch lines as a range of the model's lines"""
+    __slots__ = ('model', 'filename', 'status', 'additions', 'deletions',
+                 'first_line', 'patch_line', 'end_line', 'hunks')
+
+    def __init__(self, model, file, first_line):
+        self.model = model
+        self.filename = file['filename']
+        self.status = file['status']
+        self.additions = file['additions']
+        self.deletions = file['deletions']
+        self.first_line = first_line
+        self.patch_line = first_line
+        self.end_line = first_line
+        self.hunks = []
+
+    def has_patch(self):
+        return self.end_line > self.patch_line
+
+    def patch(self):
+        """The patch text, sliced from the shared buffer"""
+        return self.model.span(self.patch_line, self.end_line)
+
+class DiffModel(LineBuffer):
+    """
+    Parsed diff of one compare, built once from the analyzer's changed files.
+
+    Every patch is stored once in a shared buffer, preceded by a short file
+    header; files and hunks are line ranges over it. The patch strings are
+    moved out of the changed file dicts, which get their DiffFile under
+    'diff' instead, so the Changes tab, the Changed Files tab and the prompt
+    builder all read the same lines.
+    """
+
+    def __init__(self, changed_files):
+        pieces = []
+        patches = []
+        for file in changed_files:
+            patch = (file.pop('patch', None) or "").rstrip("\n")
+            patches.append(patch)
+            if patch:
+                pieces += (self.file_header(file), patch, "\n\n")
+        super().__init__("".join(pieces))
+
+        self.files = []
+        line = 0
+        for file, patch in zip(changed_files, patches):
+            diff_file = DiffFile(self, file, line)
+            file['diff'] = diff_file
+            self.files.append(diff_file)
+            if not patch:
+                continue
+
+            # Header lines, then the patch, then one blank line
+            self.kinds[line] = self.kinds[line + 1] = SECTION_HEADER
+            diff_file.patch_line = line + 2
+            hunk = None
+            end = diff_file.patch_line + patch.count("\n") + 1
+            for index in range(diff_file.patch_line, end):
+                if self.kinds[index] == HUNK_HEADER:
+                    match = HUNK_HEADER_PATTERN.match(self.line(index))
+                    if match:
+                        hunk = DiffHunk(match, index)
+                        diff_file.hunks.append(hunk)
+                if hunk:
+                    hunk.end_line = index + 1
+            diff_file.end_line = end
+            line = end + 1
+
+    def file_header(self, file):
+        return f"File: {file['filename']} ({file['status']})\nChanges: +{file['additions']}, -{file['deletions']}\n"
@@ -1,30 +1,41 @@
 # src/services/github_branch_loader.py
 
-from github import Github
+import time
+
 from github.GithubException import GithubException
 from PyQt5.QtCore import QThread, pyqtSignal
 
 class GitHubBranchLoader(QThread):
+    branches_page_loaded = pyqtSignal(list)
     branches_loaded = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, github_token, repo_full_name):
+    def __init__(self, github_session, repo_full_name):
         super().__init__()
-        self.github_token = github_token
+        self.github_session = github_session
         self.repo_full_name = repo_full_name
+        # Cost of the last load, for comparison with the GraphQL backend
+        self.request_count = 0
+        self.elapsed = 0.0
 
     def run(self):
         try:
-            g = Github(self.github_token)
-            repo = g.get_repo(self.repo_full_name)
-
+            started = time.perf_counter()
             branches = []
-            for branch in repo.get_branches():
-                branches.append({
-                    'name': branch.name,
-                    'sha': branch.commit.sha,
-                    'protected': branch.protected
-                })
+            path = f"repos/{self.repo_full_name}/branches"
+            for page in self.github_session.iter_pages(path, {'per_page': 100}):
+                page_branches = [{
+                    'name': branch['name'],
+                    'sha': branch['commit']['sha'],
+                    'protected': branch['protected']
+                } for branch in page]
+
+                # Hand every page to the UI as soon as it arrives
+                branches.extend(page_branches)
+                self.request_count += 1
+                self.branches_page_loaded.emit(page_branches)
+
+            self.elapsed = time.perf_counter() - started
 
             self.branches_loaded.emit(branches)
         except Exception as e:
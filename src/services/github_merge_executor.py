@@ -1,56 +1,343 @@
-from github import Github
-from github.GithubException import GithubException
+import base64
+from concurrent.futures import ThreadPoolExecutor
+
 from PyQt5.QtCore import QThread, pyqtSignal
-import requests
+from src.services.blob_cache import get_blob_cache
+from src.services.tree_merge import TreeMerger, tree_changes, SUBMODULE_MODE
+
+# Source branches resolved per GraphQL query
+HEADS_PER_QUERY = 50
+# Times a batched merge is rebuilt when the target moves before its ref update
+BATCH_ATTEMPTS = 3
+# Blobs downloaded at the same time while merging trees
+DEFAULT_MAX_WORKERS = 8
+
+UPDATE_REFS_MUTATION = """
+mutation($input: UpdateRefsInput!) {
+  updateRefs(input: $input) { clientMutationId }
+}
+"""
+
+def heads_query(count):
+    """
+    GraphQL query resolving the target head, count source heads and how each
+    source compares to the target, all in one request.
+    """
+    variables = "".join(f", $b{i}: String!" for i in range(count))
+    compares = "".join(f"      c{i}: compare(headRef: $b{i}) {{ status }}\n" for i in range(count))
+    refs = "".join(f"    b{i}: ref(qualifiedName: $b{i}) {{ target {{ oid }} }}\n" for i in range(count))
+    return (
+        f"query($owner: String!, $name: String!, $target: String!{variables}) {{\n"
+        f"  repository(owner: $owner, name: $name) {{\n"
+        f"    id\n"
+        f"    target: ref(qualifiedName: $target) {{\n"
+        f"      target {{ oid }}\n"
+        f"{compares}"
+        f"    }}\n"
+        f"{refs}"
+        f"  }}\n"
+        f"}}\n"
+    )
 
 class GitHubMergeExecutor(QThread):
+    """
+    Merges the source branches into the target one after another.
+
+    All heads, and how each source compares to the target, are resolved up
+    front in one GraphQL query per HEADS_PER_QUERY branches. Each branch then
+    costs a single write: a compare-and-swap fast-forward of the target ref
+    when possible, otherwise a server-side merge commit. The target head is
+    only read again when a compare-and-swap finds that it moved.
+
+    With merge_method='octopus' the branches are merged in memory instead and
+    land as one merge commit whose parents are the target and every source
+    head, created through the Git Data API and applied with a single ref
+    update. Branches that conflict are left out and merged one by one after.
+    """
     merge_completed = pyqtSignal(bool, str, dict)  # Added dict for additional merge info
     progress_update = pyqtSignal(str)
 
-    def __init__(self, github_token, repo_full_name, source_branches, target_branch, commit_message, merge_method='merge'):
+    def __init__(self, github_session, repo_full_name, source_branches, target_branch, commit_message, merge_method='merge'):
         super().__init__()
-        self.github_token = github_token
+        self.github_session = github_session
         self.repo_full_name = repo_full_name
-        self.source_branches = [item.text() for item in source_branches]
+        self.source_branches = list(source_branches)
         self.target_branch = target_branch
         self.commit_message = commit_message
-        self.merge_method = merge_method  # New parameter for merge strategy
-        self.base_url = "https://api.github.com"
+        self.merge_method = merge_method  # 'merge' or 'octopus'
         self.owner, self.repo = repo_full_name.split('/')
-        self.headers = {
-            "Authorization": f"token {self.github_token}",
-            "Accept": "application/vnd.github.v3+json"
+        self.blob_cache = get_blob_cache()
+        self.trees = {}
+        self.repository_id = None
+        # Last known head of the target branch, moved along by every write
+        self.target_sha = None
+        self.reads = 0
+        self.writes = 0
+
+    def resolve_heads(self):
+        """Return {branch: (head sha or None, comparison status, target sha it was compared to)}"""
+        heads = {}
+        branches = list(dict.fromkeys(self.source_branches))
+        for start in range(0, len(branches), HEADS_PER_QUERY):
+            chunk = branches[start:start + HEADS_PER_QUERY]
+            variables = {'owner': self.owner, 'name': self.repo, 'target': f"refs/heads/{self.target_branch}"}
+            for i, branch in enumerate(chunk):
+                variables[f"b{i}"] = f"refs/heads/{branch}"
+            repository = self.github_session.graphql(heads_query(len(chunk)), variables)['repository']
+            self.reads += 1
+
+            target = repository['target']
+            if target is None:
+                raise Exception(f"Branch {self.target_branch} not found")
+            self.repository_id = repository['id']
+            if self.target_sha is None:
+                self.target_sha = target['target']['oid']
+
+            for i, branch in enumerate(chunk):
+                ref = repository[f"b{i}"]
+                comparison = target[f"c{i}"]
+                heads[branch] = (
+                    ref['target']['oid'] if ref else None,
+                    comparison['status'] if comparison else None,
+                    target['target']['oid']
+                )
+        return heads
+
+    def read_target_sha(self):
+        response = self.github_session.request('GET', f"repos/{self.repo_full_name}/git/ref/heads/{self.target_branch}")
+        self.reads += 1
+        response.raise_for_status()
+        return response.json()['object']['sha']
+
+    def update_target(self, sha):
+        """
+        Move the target ref to sha only if it still points at the known head.
+        Returns False, after re-reading the head, when the target moved in between.
+        """
+        try:
+            self.github_session.graphql(UPDATE_REFS_MUTATION, {'input': {
+                'repositoryId': self.repository_id,
+                'refUpdates': [{
+                    'name': f"refs/heads/{self.target_branch}",
+                    'beforeOid': self.target_sha,
+                    'afterOid': sha
+                }]
+            }})
+            self.writes += 1
+            self.target_sha = sha
+            return True
+        except Exception:
+            self.writes += 1
+            current = self.read_target_sha()
+            if current == self.target_sha:
+                raise
+            self.target_sha = current
+            return False
+
+    def create_merge(self, source_branch, sha):
+        """Merge sha into the target with a server-side merge commit"""
+        response = self.github_session.request('POST', f"repos/{self.repo_full_name}/merges", json={
+            'base': self.target_branch,
+            'head': sha,
+            'commit_message': self.commit_message
+        })
+        self.writes += 1
+
+        if response.status_code == 201:
+            self.target_sha = response.json()['sha']
+            return {
+                'branch': source_branch,
+                'status': 'success',
+                'merged': True,
+                'sha': self.target_sha,
+                'message': f'Successfully merged {source_branch} into {self.target_branch}'
+            }
+        if response.status_code == 204:
+            return {
+                'branch': source_branch,
+                'status': 'skipped',
+                'merged': False,
+                'message': 'Branches are already in sync'
+            }
+        if response.status_code == 409:
+            return {
+                'branch': source_branch,
+                'status': 'conflict',
+                'merged': False,
+                'message': 'Merge conflict detected'
+            }
+        return {
+            'branch': source_branch,
+            'status': 'error',
+            'merged': False,
+            'message': response.json().get('message', response.reason)
         }
 
+    def merge_branch(self, source_branch, head):
+        """Merge one resolved source branch with a single write where possible"""
+        sha, status, compared_to = head
+        if sha is None:
+            return {
+                'branch': source_branch,
+                'status': 'error',
+                'merged': False,
+                'message': f"Branch {source_branch} not found"
+            }
+
+        # Already contained in the target, which only ever moves forward here
+        if status in ('IDENTICAL', 'BEHIND'):
+            return {
+                'branch': source_branch,
+                'status': 'skipped',
+                'merged': False,
+                'message': 'Branches are already in sync'
+            }
+
+        # Fast-forward while the target is still where the comparison saw it
+        if status == 'AHEAD' and compared_to == self.target_sha and self.update_target(sha):
+            return {
+                'branch': source_branch,
+                'status': 'success',
+                'merged': True,
+                'sha': sha,
+                'message': f'Fast-forwarded {self.target_branch} to {source_branch}'
+            }
+
+        return self.create_merge(source_branch, sha)
+
+    def load_tree(self, repo, sha):
+        """Return (tree sha, {path: (mode, sha)}) of a commit, each tree listed once"""
+        if sha not in self.trees:
+            tree = repo.get_git_tree(sha, recursive=True)
+            self.reads += 1
+            if tree.raw_data.get('truncated'):
+                raise Exception("repository tree is too large to list completely")
+            entries = {entry.path: (entry.mode, entry.sha) for entry in tree.tree if entry.type != 'tree'}
+            self.trees[sha] = (tree.sha, entries)
+        return self.trees[sha]
+
+    def merge_base(self, sha):
+        """Merge base of the known target head and sha"""
+        response = self.github_session.request(
+            'GET', f"repos/{self.repo_full_name}/compare/{self.target_sha}...{sha}", params={'per_page': 1}
+        )
+        self.reads += 1
+        response.raise_for_status()
+        return response.json()['merge_base_commit']['sha']
+
+    def read_blobs(self, repo, shas):
+        shas = list(dict.fromkeys(shas))
+        with ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS) as pool:
+            return dict(zip(shas, pool.map(lambda sha: self.blob_cache.fetch(repo, sha), shas)))
+
+    def post(self, path, payload):
+        response = self.github_session.request('POST', f"repos/{self.repo_full_name}/{path}", json=payload)
+        self.writes += 1
+        response.raise_for_status()
+        return response.json()
+
+    def create_octopus_commit(self, repo, heads, branches):
+        """
+        Merge branches into the known target head in memory and create the
+        merge commit. Returns (commit sha or None, merged branches, {conflicting branch: paths}).
+        """
+        target_tree_sha, target_tree = self.load_tree(repo, self.target_sha)
+        sources = []
+        for branch in branches:
+            sha, status, compared_to = heads[branch]
+            # A branch ahead of the target forked from it, no compare needed
+            base = self.target_sha if status == 'AHEAD' and compared_to == self.target_sha else self.merge_base(sha)
+            sources.append((branch, self.load_tree(repo, base)[1], self.load_tree(repo, sha)[1]))
+
+        merger = TreeMerger(lambda shas: self.read_blobs(repo, shas))
+        merged_tree, merged, conflicting = merger.merge(target_tree, sources)
+        if len(merged) < 2:
+            # Nothing to gain over sequential merging
+            return None, [], {}
+
+        self.progress_update.emit(f"Creating merge commit for {len(merged)} branches...")
+        changes = tree_changes(target_tree, merged_tree)
+        for path, entry in changes.items():
+            if entry and entry[1] in merger.new_blobs:
+                blob = self.post("git/blobs", {
+                    'content': base64.b64encode(merger.new_blobs[entry[1]]).decode(),
+                    'encoding': 'base64'
+                })
+                if blob['sha'] != entry[1]:
+                    raise Exception(f"Uploaded content of {path} does not match the merged file")
+
+        tree = self.post("git/trees", {
+            'base_tree': target_tree_sha,
+            'tree': [{
+                'path': path,
+                'mode': entry[0] if entry else '100644',
+                'type': 'commit' if entry and entry[0] == SUBMODULE_MODE else 'blob',
+                'sha': entry[1] if entry else None
+            } for path, entry in sorted(changes.items())]
+        })
+        commit = self.post("git/commits", {
+            'message': self.commit_message,
+            'tree': tree['sha'],
+            'parents': [self.target_sha] + [heads[branch][0] for branch in merged]
+        })
+        return commit['sha'], merged, conflicting
+
+    def run_octopus(self, heads):
+        """
+        Land every mergeable branch with one merge commit and one ref update.
+        Returns (results, branches still to merge one by one).
+        """
+        results = []
+        pending = []
+        for branch in self.source_branches:
+            sha, status, _ = heads[branch]
+            if sha is None or status in ('IDENTICAL', 'BEHIND'):
+                results.append(self.merge_branch(branch, heads[branch]))
+            else:
+                pending.append(branch)
+        if len(pending) < 2:
+            return results, pending
+
+        repo = self.github_session.get_repo(self.repo_full_name)
+        for _ in range(BATCH_ATTEMPTS):
+            self.progress_update.emit(f"Merging {len(pending)} branches in memory...")
+            commit_sha, merged, conflicting = self.create_octopus_commit(repo, heads, pending)
+            if commit_sha is None:
+                return results, pending
+            if self.update_target(commit_sha):
+                break
+            # The target moved, compare against its new head and rebuild
+            heads = self.resolve_heads()
+        else:
+            raise Exception(f"{self.target_branch} kept moving during the batched merge")
+
+        for branch in merged:
+            results.append({
+                'branch': branch,
+                'status': 'success',
+                'merged': True,
+                'sha': commit_sha,
+                'message': f'Merged into {self.target_branch} with merge commit {commit_sha[:7]}'
+            })
+        for branch, paths in conflicting.items():
+            self.progress_update.emit(f"{branch} conflicts in {len(paths)} files, merging it separately...")
+        return results, [branch for branch in pending if branch in conflicting]
+
     def run(self):
         try:
-            self.progress_update.emit("Connecting to GitHub...")
-            g = Github(self.github_token)
-            repo = g.get_repo(self.repo_full_name)
+            self.progress_update.emit("Resolving branch heads...")
+            heads = self.resolve_heads()
             merge_results = []
+            source_branches = self.source_branches
+
+            if self.merge_method == 'octopus':
+                merge_results, source_branches = self.run_octopus(heads)
 
-            for source_branch in self.source_branches:
+            for source_branch in source_branches:
                 self.progress_update.emit(f"Merging {source_branch} into {self.target_branch}...")
 
                 try:
-                    # Verify branches exist
-                    try:
-                        source = repo.get_branch(source_branch)
-                        target = repo.get_branch(self.target_branch)
-                    except GithubException:
-                        raise Exception(f"Branch {source_branch} or {self.target_branch} not found")
-
-                    # Check if branches are already in sync
-                    if source.commit.sha == target.commit.sha:
-                        merge_results.append({
-                            "branch": source_branch,
-                            "status": "skipped",
-                            "message": "Branches are already in sync"
-                        })
-                        continue
-
-                    # Try to merge
-                    merge_result = self.execute_merge(source_branch, self.target_branch)
+                    merge_result = self.merge_branch(source_branch, heads[source_branch])
                     merge_results.append(merge_result)
 
                     if merge_result['status'] == 'conflict':
@@ -71,7 +358,7 @@ class GitHubMergeExecutor(QThread):
 
             result_info = {
                 "results": merge_results,
-                "summary": f"Processed {len(merge_results)} branches"
+                "summary": f"Processed {len(merge_results)} branches with {self.reads} reads and {self.writes} writes"
             }
             self.merge_completed.emit(True, 
                 f"Successfully merged {len(self.source_branches)} branches into {self.target_branch}", 
@@ -80,59 +367,6 @@ class GitHubMergeExecutor(QThread):
         except Exception as e:
             self.merge_completed.emit(False, f"Merge failed: {str(e)}", {"error": str(e)})
 
-    def execute_merge(self, source_branch: str, target_branch: str) -> dict:
-        """
-        Directly merges the source branch into the target branch
-        Returns a dictionary with merge status
-        """
-        try:
-            g = Github(self.github_token)
-            repo = g.get_repo(f"{self.owner}/{self.repo}")
-            
-            # Get the branches
-            try:
-                source = repo.get_branch(source_branch)
-                target = repo.get_branch(target_branch)
-            except GithubException:
-                return {
-                    'status': 'error',
-                    'merged': False,
-                    'message': f"Branch {source_branch} or {target_branch} not found"
-                }
-
-            # Force update target branch with source branch content
-            try:
-                # Get the reference to update
-                ref = repo.get_git_ref(f"heads/{target_branch}")
-                # Update the reference to point to the source branch's commit
-                ref.edit(sha=source.commit.sha, force=True)
-                
-                return {
-                    'status': 'success',
-                    'merged': True,
-                    'message': f'Successfully updated {target_branch} with content from {source_branch}'
-                }
-                    
-            except GithubException as e:
-                if e.status == 409:
-                    return {
-                        'status': 'conflict',
-                        'merged': False,
-                        'message': 'Merge conflict detected'
-                    }
-                return {
-                    'status': 'error',
-                    'merged': False,
-                    'message': str(e)
-                }
-                    
-        except Exception as e:
-            return {
-                'status': 'error',
-                'merged': False,
-                'message': str(e)
-            }
-
     def get_conflicting_files(self, preview_data):
         """Helper method to extract conflicting files"""
         return [
@@ -1,29 +1,32 @@
-from github import Github
 from github.GithubException import GithubException
 from PyQt5.QtCore import QThread, pyqtSignal
 
 class GitHubRepoLoader(QThread):
+    repos_page_loaded = pyqtSignal(list)
     repos_loaded = pyqtSignal(list)
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, github_token):
+    def __init__(self, github_session):
         super().__init__()
-        self.github_token = github_token
+        self.github_session = github_session
 
     def run(self):
         try:
-            g = Github(self.github_token)
-            user = g.get_user()
-
             repos = []
-            for repo in user.get_repos():
-                if not repo.fork:  # Only include non-forked repos
-                    repos.append({
-                        'name': repo.name,
-                        'full_name': repo.full_name,
-                        'url': repo.html_url,
-                        'description': repo.description
-                    })
+            for page in self.github_session.iter_pages("user/repos", {'per_page': 100}):
+                page_repos = []
+                for repo in page:
+                    if not repo['fork']:  # Only include non-forked repos
+                        page_repos.append({
+                            'name': repo['name'],
+                            'full_name': repo['full_name'],
+                            'url': repo['html_url'],
+                            'description': repo['description']
+                        })
+
+                # Hand every page to the UI as soon as it arrives
+                repos.extend(page_repos)
+                self.repos_page_loaded.emit(page_repos)
 
             self.repos_loaded.emit(repos)
         except Exception as e:
@@ -0,0 +1,115 @@
+import sys
+import threading
+
+import requests
+from github import Github
+from github.Requester import HTTPSRequestsConnectionClass
+from src.services.http_cache import get_http_cache
+from src.services.rate_limiter import RateLimitScheduler, ScheduledAdapter
+
+API_URL = "https://api.github.com"
+GRAPHQL_URL = f"{API_URL}/graphql"
+# Keep-alive connections kept per host, sized for the analyzer worker pools
+DEFAULT_POOL_SIZE = 32
+
+class GitHubSession:
+    """
+    Process-wide GitHub connection shared by all services.
+
+    Holds one PyGithub client and one requests.Session for raw REST calls, both
+    backed by a pool of keep-alive connections so repeated loads reuse warm
+    TLS connections. Both are safe to use from several worker threads.
+    Every request of either goes through the token's RateLimitScheduler.
+    """
+
+    def __init__(self, github_token, pool_size=DEFAULT_POOL_SIZE):
+        self.github_token = github_token
+        self.scheduler = RateLimitScheduler()
+        self.github = Github(github_token, pool_size=pool_size)
+        schedule_pygithub(self.github, self.scheduler)
+
+        self.http = requests.Session()
+        adapter = ScheduledAdapter(self.scheduler, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.http.mount("https://", adapter)
+        self.http.headers.update({
+            "Authorization": f"token {github_token}",
+            "Accept": "application/vnd.github.v3+json"
+        })
+
+        self.http_cache = get_http_cache()
+
+        self.lock = threading.Lock()
+        self.repos = {}
+
+    def get_repo(self, full_name):
+        """Return the repository object, fetching it only once per session"""
+        with self.lock:
+            repo = self.repos.get(full_name)
+        if repo is None:
+            repo = self.github.get_repo(full_name)
+            with self.lock:
+                repo = self.repos.setdefault(full_name, repo)
+        return repo
+
+    def request(self, method, path, **kwargs):
+        """Send a raw REST request; path may be relative to the API root or a full URL"""
+        return self.http.request(method, self.url_for(path), **kwargs)
+
+    def url_for(self, path):
+        return path if path.startswith("http") else f"{API_URL}/{path.lstrip('/')}"
+
+    def iter_pages(self, path, params=None):
+        """
+        Yield each page of a paginated listing, following the Link header.
+        Pages are revalidated through the ETag cache so unchanged pages cost no rate limit.
+        """
+        url = self.url_for(path)
+        while url:
+            data, links = self.http_cache.get(self.http, url, params=params, scope=self.github_token)
+            yield data
+            url = links.get('next')
+            # The next link already carries the query string
+            params = None
+
+    def graphql(self, query, variables=None):
+        """Run a GraphQL query and return its data, raising on any reported error"""
+        response = self.http.post(GRAPHQL_URL, json={'query': query, 'variables': variables or {}})
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get('errors'):
+            raise Exception("; ".join(error.get('message', str(error)) for error in payload['errors']))
+        return payload['data']
+
+    def close(self):
+        self.http.close()
+
+def schedule_pygithub(github, scheduler):
+    """Make PyGithub send its requests through scheduler"""
+
+    class ScheduledConnection(HTTPSRequestsConnectionClass):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.adapter = ScheduledAdapter(
+                scheduler, max_retries=self.retry, pool_connections=self.pool_size, pool_maxsize=self.pool_size
+            )
+            self.session.mount("https://", self.adapter)
+
+    # PyGithub has no public hook for its transport; the connection class is
+    # picked per Requester and instantiated lazily on the first request
+    requester = getattr(github, 'requester', None)
+    if not hasattr(requester, '_Requester__connectionClass'):
+        print("Warning: this PyGithub version cannot be scheduled, its requests bypass the rate limiter", file=sys.stderr)
+        return
+    requester._Requester__connectionClass = ScheduledConnection
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_github_session(github_token):
+    """Return the shared session for github_token, creating it on first use"""
+    with _sessions_lock:
+        session = _sessions.get(github_token)
+        if session is None:
+            session = GitHubSession(github_token)
+            _sessions[github_token] = session
+        return session
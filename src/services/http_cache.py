@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import requests
+
+DEFAULT_CACHE_DIR = os.path.expanduser("~/.github_merge_assistant_cache/http")
+
+class HttpCache:
+    """
+    Persistent cache of GitHub GET responses validated with ETag / Last-Modified.
+
+    Each URL is revalidated with a conditional request; a 304 answer is served
+    from disk and does not count against the GitHub rate limit.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + ".json")
+
+    def load(self, key):
+        try:
+            with open(self.path_for(key), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, entry):
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing HTTP cache: {e}", file=sys.stderr)
+
+    def get(self, http, url, params=None, scope=""):
+        """
+        GET url through the requests session http, revalidating any cached copy.
+        scope separates entries for different credentials on the same URL.
+        Returns (data, links) where links is the parsed Link header.
+        """
+        url = requests.Request('GET', url, params=params).prepare().url
+        key = f"{scope}\n{url}"
+        entry = self.load(key)
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = http.get(url, headers=headers)
+        if response.status_code == 304 and entry:
+            with self.lock:
+                self.hits += 1
+            return entry['data'], entry.get('links', {})
+
+        response.raise_for_status()
+        with self.lock:
+            self.misses += 1
+
+        data = response.json()
+        links = {rel: link['url'] for rel, link in response.links.items()}
+        if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+            self.store(key, {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'links': links,
+                'data': data
+            })
+        return data, links
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_http_cache():
+    """Return the process-wide HTTP cache shared by all services"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = HttpCache()
+        return _shared_cache
@@ -0,0 +1,211 @@
+import base64
+import os
+import subprocess
+import threading
+import time
+
+DEFAULT_MIRROR_DIR = os.path.expanduser("~/.github_merge_assistant_cache/mirrors")
+# Skip fetching again when the mirror was updated this recently (seconds)
+DEFAULT_MAX_AGE = 30
+# Context lines around changes in patches, the same as GitHub's
+DEFAULT_CONTEXT_LINES = 3
+
+# Only branches are fetched into the mirror
+BRANCH_REFSPEC = "+refs/heads/*:refs/heads/*"
+
+# Status letters of `git diff --raw` mapped to the names GitHub's compare API uses
+DIFF_STATUS = {
+    'A': 'added',
+    'D': 'removed',
+    'M': 'modified',
+    'R': 'renamed',
+    'C': 'copied',
+    'T': 'changed'
+}
+
+_mirror_locks = {}
+_mirror_locks_lock = threading.Lock()
+_last_fetch = {}
+
+def _lock_for(path):
+    with _mirror_locks_lock:
+        return _mirror_locks.setdefault(path, threading.Lock())
+
+class LocalMirror:
+    """
+    Local bare mirror of a GitHub repository.
+
+    Compares, patches, blob contents and commit counts are computed from the
+    local object database; the network is only used by update(), which fetches
+    incrementally. remote_url may point at any git remote, including a local
+    path, so the mirror also works fully offline.
+    """
+
+    def __init__(self, repo_full_name, github_token=None, mirror_dir=DEFAULT_MIRROR_DIR, remote_url=None):
+        self.repo_full_name = repo_full_name
+        self.github_token = github_token
+        self.remote_url = remote_url or f"https://github.com/{repo_full_name}.git"
+        self.path = os.path.join(mirror_dir, repo_full_name.replace('/', '__') + ".git")
+        self.lock = _lock_for(self.path)
+
+    def git(self, *args, input=None, auth=False):
+        command = ['git']
+        env = None
+        if auth and self.github_token and self.remote_url.startswith("https://"):
+            # Pass the token per command through the environment, so it is neither
+            # written to the mirror's config nor visible on the command line
+            credentials = base64.b64encode(f"x-access-token:{self.github_token}".encode()).decode()
+            env = dict(os.environ)
+            index = int(env.get('GIT_CONFIG_COUNT') or 0)
+            env['GIT_CONFIG_COUNT'] = str(index + 1)
+            env[f'GIT_CONFIG_KEY_{index}'] = 'http.extraHeader'
+            env[f'GIT_CONFIG_VALUE_{index}'] = f"Authorization: Basic {credentials}"
+        if os.path.isdir(self.path):
+            command += ['--git-dir', self.path]
+        command += list(args)
+
+        result = subprocess.run(command, input=input, capture_output=True, env=env)
+        if result.returncode != 0:
+            raise Exception(f"git {args[0]} failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+        return result.stdout
+
+    def update(self, max_age=DEFAULT_MAX_AGE):
+        """Create the mirror on first use, otherwise fetch what changed since the last update"""
+        with self.lock:
+            if time.time() - _last_fetch.get(self.path, 0) < max_age:
+                return
+            if not os.path.isdir(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                # Bare, not --mirror: a mirror clone also fetches every refs/pull/* on GitHub
+                self.git('clone', '--bare', '--quiet', self.remote_url, self.path, auth=True)
+            else:
+                # The explicit refspec also keeps mirrors created with --mirror to branches only
+                self.git('fetch', '--prune', '--quiet', 'origin', BRANCH_REFSPEC, auth=True)
+            _last_fetch[self.path] = time.time()
+
+    def resolve(self, branch):
+        return self.git('rev-parse', '--verify', f"refs/heads/{branch}^{{commit}}").decode().strip()
+
+    def merge_base(self, first, second):
+        return self.git('merge-base', first, second).decode().strip()
+
+    def commit_count(self, base, head):
+        """Number of commits in head that are not in base, like len(comparison.commits)"""
+        return int(self.git('rev-list', '--count', f"{base}..{head}").decode().strip())
+
+    def tree_blobs(self, commit, sizes=None):
+        """
+        Map every file path in commit to its blob SHA.
+        When a sizes dict is given, it is filled with the size of every blob by SHA.
+        """
+        blobs = {}
+        for entry in self.git('ls-tree', '-r', '-l', '-z', commit).split(b'\0'):
+            if not entry:
+                continue
+            info, path = entry.split(b'\t', 1)
+            _, kind, sha, size = info.split()
+            if kind == b'blob':
+                blobs[path.decode('utf-8', 'replace')] = sha.decode()
+                if sizes is not None:
+                    sizes[sha.decode()] = int(size)
+        return blobs
+
+    def read_blob_head(self, sha, limit):
+        """Read only the first limit bytes of a blob"""
+        process = subprocess.Popen(
+            ['git', '--git-dir', self.path, 'cat-file', 'blob', sha],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        try:
+            return process.stdout.read(limit)
+        finally:
+            process.kill()
+            process.stdout.close()
+            process.wait()
+
+    def read_blobs(self, shas):
+        """Read many blobs with a single `git cat-file --batch` call"""
+        shas = list(dict.fromkeys(sha for sha in shas if sha))
+        if not shas:
+            return {}
+        output = self.git('cat-file', '--batch', input=("\n".join(shas) + "\n").encode())
+
+        blobs = {}
+        position = 0
+        for sha in shas:
+            header_end = output.index(b'\n', position)
+            header = output[position:header_end].split()
+            position = header_end + 1
+            if len(header) < 3 or header[1] == b'missing':
+                continue
+            size = int(header[2])
+            blobs[sha] = output[position:position + size]
+            position += size + 1
+        return blobs
+
+    def compare(self, base, head, context_lines=DEFAULT_CONTEXT_LINES):
+        """
+        Files changed between the merge base of base and head and head, the
+        same three-dot comparison GitHub's compare API reports. Patches carry
+        context_lines of context around every change.
+        """
+        merge_base = self.merge_base(base, head)
+
+        files = []
+        raw = self.git('diff', '--raw', '-z', '-M', '--no-abbrev', merge_base, head).split(b'\0')
+        index = 0
+        while index < len(raw) - 1:
+            info = raw[index].decode().lstrip(':').split()
+            status = info[4][0]
+            if status in 'RC':
+                previous, path = raw[index + 1], raw[index + 2]
+                index += 3
+            else:
+                previous = path = raw[index + 1]
+                index += 2
+            files.append({
+                'filename': path.decode('utf-8', 'replace'),
+                'previous_filename': previous.decode('utf-8', 'replace'),
+                'status': DIFF_STATUS.get(status, 'modified'),
+                'sha': info[3],
+                'additions': 0,
+                'deletions': 0,
+                'patch': None
+            })
+
+        stats = self.git('diff', '--numstat', '-z', '-M', merge_base, head).split(b'\0')
+        index = 0
+        for file in files:
+            counts = stats[index].split(b'\t')
+            # Renames are reported as "added\tdeleted\t" followed by both paths
+            index += 3 if counts[2] == b'' else 1
+            if counts[0] != b'-':
+                file['additions'] = int(counts[0])
+                file['deletions'] = int(counts[1])
+            file['changes'] = file['additions'] + file['deletions']
+
+        patches = self.git('diff', '-M', '--no-color', f"-U{context_lines}", merge_base, head).decode('utf-8', 'replace')
+        sections = patches.split("\ndiff --git ")
+        if len(sections) == len(files):
+            for file, section in zip(files, sections):
+                # GitHub patches start at the first hunk, without the diff header
+                hunk_start = section.find("\n@@")
+                if hunk_start >= 0:
+                    file['patch'] = section[hunk_start + 1:].rstrip('\n')
+
+        return merge_base, files
+
+
+    def changed_blobs(self, base, head):
+        """Map every path that differs between base and head to its (base blob SHA, head blob SHA)"""
+        missing = '0' * 40
+        changed = {}
+        raw = self.git('diff', '--raw', '-z', '--no-renames', '--no-abbrev', base, head).split(b'\0')
+        for index in range(0, len(raw) - 1, 2):
+            info = raw[index].decode().lstrip(':').split()
+            path = raw[index + 1].decode('utf-8', 'replace')
+            changed[path] = (
+                None if info[2] == missing else info[2],
+                None if info[3] == missing else info[3]
+            )
+        return changed
@@ -0,0 +1,122 @@
+from src.services.merge_analysis import MergeAnalysis
+from src.services.local_mirror import LocalMirror, DEFAULT_CONTEXT_LINES
+from src.services.commit_graph import get_commit_graph
+from src.services.content_policy import BINARY, MAX_CONTENT_BYTES, SAMPLE_BYTES, is_binary_path, sampled_reason
+
+# Bytes of blobs read from the mirror per cat-file call, only one batch is in memory at a time
+BLOB_BATCH_BYTES = 32 * 1024 * 1024
+# Context lines around every change in the patches of patch-first analyses
+PATCH_FIRST_CONTEXT_LINES = 10
+
+class LocalMirrorAnalysis(MergeAnalysis):
+    """
+    MergeAnalysis backend that reads everything from a local mirror of the
+    repository. The mirror is fetched incrementally before each analysis;
+    the compare, patches, file contents and commit count are then local reads.
+    Produces the same result dict as MergeAnalysis. Patch-first analyses
+    get patches with context_lines of context, so the model sees more of the
+    surrounding code without the full files.
+    """
+
+    def __init__(self, github_session, gemini_api_key, repo_full_name, source_branch, target_branch,
+                 mirror=None, context_lines=PATCH_FIRST_CONTEXT_LINES, **kwargs):
+        super().__init__(github_session, gemini_api_key, repo_full_name, source_branch, target_branch, **kwargs)
+        self.mirror = mirror or LocalMirror(repo_full_name, github_session.github_token)
+        self.context_lines = context_lines if self.patch_first else DEFAULT_CONTEXT_LINES
+        self.source_sha = None
+        self.target_sha = None
+
+    def spill_blobs(self, blobs):
+        """
+        Load (sha, path) blobs from the mirror into the content store. Binary
+        files are skipped and files over MAX_CONTENT_BYTES sampled, like the
+        GitHub backend; the rest is read in batches of about BLOB_BATCH_BYTES.
+        """
+        batch = []
+        batch_bytes = 0
+        for sha, path in dict(blobs).items():
+            size = self.blob_sizes.get(sha, 0)
+            if is_binary_path(path):
+                _, self.skip_reasons[sha] = self.skip_content(sha, BINARY)
+            elif size > MAX_CONTENT_BYTES:
+                _, self.skip_reasons[sha] = self.store_content(
+                    sha, self.mirror.read_blob_head(sha, SAMPLE_BYTES), sampled_reason(size)
+                )
+            else:
+                batch.append(sha)
+                batch_bytes += size
+                if batch_bytes >= BLOB_BATCH_BYTES:
+                    self.spill_batch(batch)
+                    batch = []
+                    batch_bytes = 0
+        self.spill_batch(batch)
+
+    def spill_batch(self, shas):
+        for sha, data in self.mirror.read_blobs(shas).items():
+            _, reason = self.store_content(sha, data)
+            if reason:
+                self.skip_reasons[sha] = reason
+
+    def content_handle(self, sha, branch, path):
+        """Return (ContentHandle, skip reason or None) of a spilled blob"""
+        if not sha:
+            return self.content_store.put_text(f"Error reading file: {path} does not exist in {branch}"), None
+        handle = self.content_store.get(sha)
+        if handle is None:
+            return self.content_store.put_text(f"Error reading file: blob {sha} is missing from the mirror"), None
+        return handle, self.skip_reasons.get(sha)
+
+    def load_contents(self, files):
+        files = [f for f in files if f.get('source_content') is None]
+        self.spill_blobs(
+            [(f['source_sha'], f['filename']) for f in files if f['source_sha']] +
+            [(f['target_sha'], f['filename']) for f in files if f['target_sha']]
+        )
+        for file in files:
+            file['source_content'], source_skip = self.content_handle(file['source_sha'], self.source_branch, file['filename'])
+            file['target_content'], target_skip = self.content_handle(file['target_sha'], self.target_branch, file['filename'])
+            file['skip_reason'] = source_skip or target_skip
+
+    def collect_changes(self):
+        self.progress_update.emit("Updating local mirror...")
+        self.mirror.update()
+        self.target_sha = self.mirror.resolve(self.target_branch)
+        self.source_sha = self.mirror.resolve(self.source_branch)
+
+        # Compare target (main) to source (newbranch) to see what changes will be applied
+        self.progress_update.emit("Comparing branches...")
+        self.merge_base_sha, files = self.mirror.compare(self.target_sha, self.source_sha, self.context_lines)
+
+        self.progress_update.emit("Analyzing changes...")
+        self.trees[self.target_branch] = self.mirror.tree_blobs(self.target_sha, self.blob_sizes)
+        self.trees[self.source_branch] = self.mirror.tree_blobs(self.source_sha, self.blob_sizes)
+
+        changed_files = []
+        for file in files:
+            changed_files.append({
+                'filename': file['filename'],
+                'previous_filename': file['previous_filename'] if file['status'] in ('renamed', 'copied') else None,
+                'status': file['status'],
+                'additions': file['additions'],
+                'deletions': file['deletions'],
+                'changes': file['changes'],
+                'patch': file['patch'],
+                'source_content': None,
+                'target_content': None,
+                'skip_reason': None,
+                'source_sha': self.trees[self.source_branch].get(file['filename']),
+                'target_sha': self.trees[self.target_branch].get(file['filename'])
+            })
+
+        if not self.patch_first:
+            self.load_contents(changed_files)
+
+        # Commits ahead of the target, from the shared commit graph instead of a rev-list per pair
+        graph = get_commit_graph(self.mirror.repo_full_name)
+        graph.update_from_mirror(self.mirror, [self.target_sha, self.source_sha])
+        commit_count, _ = graph.ahead_behind(self.source_sha, self.target_sha)
+
+        return changed_files, commit_count
+
+    def load_conflict_inputs(self):
+        return self.mirror.tree_blobs(self.merge_base_sha, self.blob_sizes), self.mirror.read_blobs
@@ -0,0 +1,6 @@
+from src.services.github_merge_analyzer import GitHubMergeAnalyzer
+from src.services.local_mirror_analysis import LocalMirrorAnalysis
+
+class LocalMirrorAnalyzer(GitHubMergeAnalyzer):
+    """GitHubMergeAnalyzer running the local mirror backend"""
+    analysis_class = LocalMirrorAnalysis
@@ -0,0 +1,416 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
+
+from src.services.callbacks import Callback
+from src.services.analysis_cache import get_analysis_cache
+from src.services.blob_cache import get_blob_cache, get_tree_blobs, open_raw
+from src.services.conflict_detector import ConflictDetector
+from src.services.content_policy import (
+    BINARY, MAX_CONTENT_BYTES, RAW_CHUNK_BYTES, RAW_STREAM_THRESHOLD, SAMPLE_BYTES,
+    is_binary, is_binary_path, sampled_reason, truncated_reason
+)
+from src.services.content_store import ContentStore
+from src.services.diff_model import DiffModel
+from src.services.prompt_builder import (
+    PromptBuilder, DEFAULT_TOKEN_BUDGET, PROMPT_VERSION, could_be_context_request, parse_context_request
+)
+
+MODEL_NAME = 'gemini-1.5-flash-latest'
+# Number of files whose contents are fetched concurrently
+DEFAULT_MAX_WORKERS = 8
+# Per-file analyses sent to the model at the same time
+DEFAULT_AI_WORKERS = 4
+# Files loaded for one context request of a patch-first analysis
+MAX_CONTEXT_FILES = 20
+
+class MergeAnalysis:
+    """
+    Analysis of what merging a source branch into a target would bring in:
+    changed files with both contents, conflicts and the AI review.
+
+    With patch_first, no file contents are downloaded up front: the AI
+    review starts from the patches and the model may ask for the files it
+    needs, and the result's load_contents(files) fetches the rest on demand.
+
+    Plain Python with no Qt dependency; progress and results are reported
+    through Callback objects named like the signals of GitHubMergeAnalyzer,
+    which runs it on a QThread for the GUI.
+    """
+
+    def __init__(self, github_session, gemini_api_key, repo_full_name, source_branch, target_branch,
+                 max_workers=DEFAULT_MAX_WORKERS, blob_cache=None, token_budget=DEFAULT_TOKEN_BUDGET,
+                 per_file_analysis=False, analysis_cache=None, content_store=None, patch_first=False):
+        self.analysis_completed = Callback()
+        self.analysis_chunk = Callback()  # source branch, partial AI analysis text
+        self.error_occurred = Callback()
+        self.progress_update = Callback()
+        self.github_session = github_session
+        self.gemini_api_key = gemini_api_key
+        self.repo_full_name = repo_full_name
+        self.source_branch = source_branch
+        self.target_branch = target_branch
+        self.max_workers = max(1, max_workers)
+        self.blob_cache = blob_cache or get_blob_cache()
+        self.token_budget = token_budget
+        self.per_file_analysis = per_file_analysis
+        self.patch_first = patch_first
+        self.analysis_cache = analysis_cache or get_analysis_cache()
+        # File contents are spilled here, changed_files only hold handles to them
+        self.content_store = content_store or ContentStore()
+        self.trees = {}
+        self.trees_complete = True
+        self.blob_sizes = {}  # blob SHA -> size, from the tree listings
+        self.skip_reasons = {}  # blob SHA -> why its content was not loaded whole
+        self.merge_base_sha = None
+
+    def load_trees(self, repo):
+        """Resolve the blob SHA of every file on both branches so contents can be served from the blob cache"""
+        for branch in (self.target_branch, self.source_branch):
+            try:
+                self.trees[branch], truncated = get_tree_blobs(repo, branch, self.blob_sizes)
+            except Exception:
+                self.trees[branch], truncated = {}, True
+            if truncated:
+                self.trees_complete = False
+
+    def skip_content(self, key, reason):
+        """A content that is not loaded, as an empty handle"""
+        return self.content_store.put(b"", key), reason
+
+    def store_content(self, key, data, reason=None):
+        """Put fetched bytes into the content store unless they are binary, return (handle, skip reason)"""
+        if is_binary(data):
+            return self.skip_content(key, BINARY)
+        return self.content_store.put(data, key), reason
+
+    def stream_content(self, key, path, size=None, params=None):
+        """
+        Stream a raw blob or file into the content store. Binary files are
+        dropped after the first chunk, files over MAX_CONTENT_BYTES are sampled.
+        """
+        with open_raw(self.github_session, path, params) as response:
+            if size is None and response.headers.get('Content-Length'):
+                size = int(response.headers['Content-Length'])
+            chunks = response.iter_content(RAW_CHUNK_BYTES)
+            first = next(chunks, b"")
+            if is_binary(first):
+                return self.skip_content(key, BINARY)
+            if size is None:
+                return self.stream_unknown_length(key, first, chunks)
+            reason = sampled_reason(size) if size > MAX_CONTENT_BYTES else None
+            limit = SAMPLE_BYTES if reason else size
+            return self.content_store.put_chunks(itertools.chain([first], chunks), limit, key), reason
+
+    def stream_unknown_length(self, key, first, chunks):
+        """Store a stream without a Content-Length in a growing range, up to MAX_CONTENT_BYTES"""
+        received = len(first)
+
+        def counted():
+            nonlocal received
+            yield first
+            for chunk in chunks:
+                received += len(chunk)
+                yield chunk
+
+        handle = self.content_store.put_chunks(counted(), MAX_CONTENT_BYTES, key, reserve=SAMPLE_BYTES)
+        # Bytes cut off the last chunk, or chunks left over, mean the body was longer
+        truncated = received > len(handle) or (len(handle) == MAX_CONTENT_BYTES and any(chunks))
+        return handle, truncated_reason(MAX_CONTENT_BYTES) if truncated else None
+
+    def load_blob(self, repo, sha, path):
+        """Load a blob by the size and type known from the tree listing, return (handle, skip reason)"""
+        handle = self.content_store.get(sha)
+        if handle is not None:
+            return handle, self.skip_reasons.get(sha)
+        size = self.blob_sizes.get(sha)
+        if is_binary_path(path):
+            handle, reason = self.skip_content(sha, BINARY)
+        elif size is not None and size > RAW_STREAM_THRESHOLD:
+            handle, reason = self.stream_content(sha, f"repos/{self.repo_full_name}/git/blobs/{sha}", size)
+        else:
+            handle, reason = self.store_content(sha, self.blob_cache.fetch(repo, sha))
+        if reason:
+            self.skip_reasons[sha] = reason
+        return handle, reason
+
+    def get_file_content(self, repo, branch, path):
+        """Fetch one file into the content store, return (ContentHandle, skip reason or None)"""
+        try:
+            sha = self.trees.get(branch, {}).get(path)
+            if sha:
+                return self.load_blob(repo, sha, path)
+            if self.trees_complete:
+                return self.content_store.put_text(f"Error reading file: {path} does not exist in {branch}"), None
+            # Not in the truncated tree listing, fall back to the contents endpoint
+            if is_binary_path(path):
+                return self.skip_content(None, BINARY)
+            return self.stream_content(
+                None, f"repos/{self.repo_full_name}/contents/{quote(path)}", params={'ref': branch}
+            )
+        except Exception as e:
+            return self.content_store.put_text(f"Error reading file: {str(e)}"), None
+
+    def fetch_file_contents(self, repo, filenames):
+        """
+        Fetch target and source content of every file on a bounded worker pool.
+        Returns a list of ((target_content, skip reason), (source_content, skip reason)) in the order of filenames.
+        """
+        contents = [[None, None] for _ in filenames]
+        total = len(filenames)
+        if not total:
+            return []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            for index, filename in enumerate(filenames):
+                futures[pool.submit(self.get_file_content, repo, self.target_branch, filename)] = (index, 0)
+                futures[pool.submit(self.get_file_content, repo, self.source_branch, filename)] = (index, 1)
+
+            pending = [2] * total
+            done = 0
+            for future in as_completed(futures):
+                index, side = futures[future]
+                contents[index][side] = future.result()
+                pending[index] -= 1
+                if pending[index] == 0:
+                    done += 1
+                    self.progress_update.emit(f"Fetched {done}/{total}: {filenames[index]}")
+
+        return [tuple(pair) for pair in contents]
+
+    def load_contents(self, files):
+        """
+        Fetch both contents of the changed files that do not have them yet.
+        Patch-first analyses call this only for the files the model or the
+        user asks for.
+        """
+        files = [f for f in files if f.get('source_content') is None]
+        if not files:
+            return
+        repo = self.github_session.get_repo(self.repo_full_name)
+        contents = self.fetch_file_contents(repo, [f['filename'] for f in files])
+        for file, ((target_content, target_skip), (source_content, source_skip)) in zip(files, contents):  # main, newbranch
+            file['source_content'] = source_content
+            file['target_content'] = target_content
+            file['skip_reason'] = source_skip or target_skip
+
+    def requested_files(self, changed_files, paths):
+        """The changed files a context request names, at most MAX_CONTEXT_FILES"""
+        by_name = {f['filename']: f for f in changed_files}
+        return [by_name[path] for path in dict.fromkeys(paths) if path in by_name][:MAX_CONTEXT_FILES]
+
+    def stream_answer(self, model, prompt, context_requests=False):
+        """
+        Stream the answer to prompt to the UI and return (answer, requested paths).
+        With context_requests, nothing is shown while the answer may still be
+        a context request, which is returned instead of shown.
+        """
+        answer = ""
+        shown = 0
+        for chunk in model.generate_content(prompt, stream=True):
+            answer += chunk.text
+            if context_requests and could_be_context_request(answer):
+                continue
+            self.analysis_chunk.emit(self.source_branch, answer[shown:])
+            shown = len(answer)
+
+        requested = parse_context_request(answer) if context_requests else []
+        if not requested and shown < len(answer):
+            self.analysis_chunk.emit(self.source_branch, answer[shown:])
+        return answer, requested
+
+    def finding_key(self, file, prompt_version):
+        """
+        Cache key of a file's finding, or None when it cannot be cached. A
+        missing SHA only means the file is absent from that branch when the
+        tree listings are complete; otherwise the SHA is simply unknown.
+        """
+        if not self.trees_complete and not (file['target_sha'] and file['source_sha']):
+            return None
+        return (file['target_sha'] or '-', file['source_sha'] or '-', prompt_version, MODEL_NAME)
+
+    def analyze_per_file(self, model, builder, changed_files):
+        """
+        Analyse every changed file on its own and assemble the branch report.
+        Findings are cached by blob SHAs, so only files whose content changed
+        since an earlier analysis are sent to the model.
+        """
+        files = [f for f in changed_files if f['diff'].has_patch()]
+        findings = [None] * len(files)
+        missing = []
+        # Findings from patches alone are kept apart from those made with full contents
+        prompt_version = f"{PROMPT_VERSION}-patch" if self.patch_first else PROMPT_VERSION
+        for index, file in enumerate(files):
+            key = self.finding_key(file, prompt_version)
+            findings[index] = self.analysis_cache.get(key) if key else None
+            if findings[index] is None:
+                missing.append((index, key))
+
+        self.progress_update.emit(
+            f"Reusing {len(files) - len(missing)} cached file analyses, analysing {len(missing)} files..."
+        )
+
+        def analyze_one(item):
+            index, key = item
+            file = files[index]
+            context_requests = self.patch_first and file.get('source_content') is None
+            finding = model.generate_content(builder.file_prompt(file, context_requests)).text
+            if context_requests and parse_context_request(finding):
+                self.load_contents([file])
+                finding = model.generate_content(builder.file_prompt(file)).text
+            if key:
+                self.analysis_cache.put(key, finding)
+            return index, finding
+
+        with ThreadPoolExecutor(max_workers=DEFAULT_AI_WORKERS) as pool:
+            for index, finding in pool.map(analyze_one, missing):
+                findings[index] = finding
+
+        return builder.combine_findings([(f['filename'], finding) for f, finding in zip(files, findings)])
+
+    def generate_analysis(self, changed_files):
+        # Imported on first use, the SDK alone takes longer to load than the rest of the app
+        import google.generativeai as genai
+        genai.configure(api_key=self.gemini_api_key)
+        model = genai.GenerativeModel(MODEL_NAME)
+        builder = PromptBuilder(self.source_branch, self.target_branch, token_budget=self.token_budget)
+
+        if self.per_file_analysis:
+            ai_analysis = self.analyze_per_file(model, builder, changed_files)
+            self.analysis_chunk.emit(self.source_branch, ai_analysis)
+            return ai_analysis
+
+        # Pack the changes into the prompt budget, summarizing them first if they do not fit
+        def generate(text):
+            return model.generate_content(text).text
+
+        prompt = builder.build(changed_files, generate, self.progress_update.emit, self.patch_first)
+
+        # Stream the answer so the UI can show it while it is generated
+        ai_analysis, requested = self.stream_answer(model, prompt, self.patch_first)
+        if requested:
+            # The model asked for full files, answer once more with them included
+            files = self.requested_files(changed_files, requested)
+            self.progress_update.emit(f"Loading {len(files)} files the model asked for...")
+            self.load_contents(files)
+            prompt = builder.build(changed_files, generate, self.progress_update.emit)
+            ai_analysis, _ = self.stream_answer(model, prompt)
+        return ai_analysis
+
+    def collect_changes(self):
+        """Return (changed_files, commit_count) for the changes source brings over target"""
+        repo = self.github_session.get_repo(self.repo_full_name)
+
+        # Compare target (main) to source (newbranch) to see what changes will be applied
+        self.progress_update.emit("Comparing branches...")
+        comparison = repo.compare(self.target_branch, self.source_branch)
+        self.merge_base_sha = comparison.merge_base_commit.sha
+
+        # Get files that were changed
+        changed_files = []
+
+        self.progress_update.emit("Analyzing changes...")
+        files = list(comparison.files)
+        self.load_trees(repo)
+        for file in files:
+            changed_files.append({
+                'filename': file.filename,
+                'previous_filename': file.previous_filename,
+                'status': file.status,
+                'additions': file.additions,
+                'deletions': file.deletions,
+                'changes': file.changes,
+                'patch': file.patch if hasattr(file, 'patch') else None,
+                'source_content': None,  # newbranch content, set by load_contents
+                'target_content': None,  # main content
+                'skip_reason': None,
+                'source_sha': self.trees[self.source_branch].get(file.filename),
+                'target_sha': self.trees[self.target_branch].get(file.filename)
+            })
+
+        # Get content from both branches, patch-first analyses fetch it on demand
+        if not self.patch_first:
+            self.load_contents(changed_files)
+
+        return changed_files, len(comparison.commits)
+
+    def read_blobs(self, repo, shas):
+        """Fetch many blobs through the blob cache on the worker pool"""
+        shas = list(dict.fromkeys(shas))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return dict(zip(shas, pool.map(lambda sha: self.blob_cache.fetch(repo, sha), shas)))
+
+    def load_conflict_inputs(self):
+        """Return the merge base tree and a read_blobs(shas) function for the conflict detector"""
+        if not self.trees_complete:
+            raise Exception("repository tree is too large to list completely")
+        repo = self.github_session.get_repo(self.repo_full_name)
+        base_tree, truncated = get_tree_blobs(repo, self.merge_base_sha, self.blob_sizes)
+        if truncated:
+            raise Exception("repository tree is too large to list completely")
+        return base_tree, lambda shas: self.read_blobs(repo, shas)
+
+    def check_conflicts(self, changed_files):
+        """
+        Three-way merge the changed files against the merge base without merging
+        anything on GitHub. Marks each file with its conflict (or None).
+        """
+        self.progress_update.emit("Checking for merge conflicts...")
+        for file in changed_files:
+            file['conflict'] = None
+        try:
+            base_tree, read_blobs = self.load_conflict_inputs()
+            conflicts = ConflictDetector(read_blobs, self.blob_sizes).detect(
+                changed_files, base_tree, self.trees[self.target_branch], self.trees[self.source_branch]
+            )
+        except Exception as e:
+            self.progress_update.emit(f"Conflict check skipped: {str(e)}")
+            return False
+
+        for file in changed_files:
+            file['conflict'] = conflicts.get(file['filename'])
+        return bool(conflicts)
+
+    def run(self):
+        try:
+            self.progress_update.emit("Getting repository information...")
+            changed_files, commit_count = self.collect_changes()
+            # Parsed once, the views and the prompt builder all read this model
+            diff = DiffModel(changed_files)
+
+            # Use AI to analyze changes
+            ai_error = None
+            if self.gemini_api_key:
+                self.progress_update.emit("Generating AI analysis...")
+                try:
+                    ai_analysis = self.generate_analysis(changed_files)
+                except Exception as e:
+                    # Part of the answer may already have been streamed
+                    ai_error = f"AI analysis failed: {str(e)}"
+                    ai_analysis = ai_error
+            else:
+                ai_analysis = "AI analysis skipped: no Gemini API key"
+
+            # Remove the test merge during comparison
+            has_conflicts = self.check_conflicts(changed_files)
+
+            # Prepare result
+            result = {
+                'repo': self.repo_full_name,
+                'source_branch': self.source_branch,
+                'target_branch': self.target_branch,
+                'changed_files': changed_files,
+                'diff': diff,
+                'load_contents': self.load_contents,
+                'has_conflicts': has_conflicts,
+                'ai_analysis': ai_analysis,
+                'ai_error': ai_error,
+                'total_additions': sum(f['additions'] for f in changed_files),
+                'total_deletions': sum(f['deletions'] for f in changed_files),
+                'commit_count': commit_count
+            }
+
+            self.analysis_completed.emit(result)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
\ No newline at end of file
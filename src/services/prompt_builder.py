@@ -0,0 +1,267 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.services.content_policy import BINARY
+
+# Rough size of a token for source code and English text
+CHARS_PER_TOKEN = 4
+# Tokens allowed in a single analysis prompt
+DEFAULT_TOKEN_BUDGET = 120000
+# Tokens of changes summarized by one map call when the diff does not fit
+DEFAULT_CHUNK_BUDGET = 24000
+# Map calls sent to the model at the same time
+DEFAULT_SUMMARY_WORKERS = 4
+# Bump whenever file_prompt changes so cached per-file findings are not reused
+PROMPT_VERSION = "2"
+# Headings every per-file finding is asked to use, in report order
+FINDING_SECTIONS = ("Summary", "Risks", "Testing", "Review focus")
+# Prefix of the lines a patch-first answer uses to ask for full file contents
+CONTEXT_REQUEST = "NEED_CONTEXT:"
+
+def estimate_tokens(text):
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def could_be_context_request(text):
+    """True while a streamed answer may still turn out to be a context request"""
+    text = text.lstrip()
+    return text.startswith(CONTEXT_REQUEST) or CONTEXT_REQUEST.startswith(text)
+
+def parse_context_request(text):
+    """The paths an answer asks the full contents of, or [] when it is a normal answer"""
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    if not lines or not all(line.startswith(CONTEXT_REQUEST) for line in lines):
+        return []
+    return [line[len(CONTEXT_REQUEST):].strip() for line in lines]
+
+def split_text(text, max_tokens):
+    """Split text on line boundaries into pieces of at most max_tokens each"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    current = []
+    size = 0
+    for line in text.splitlines(keepends=True):
+        # Hard-wrap single lines that are larger than a whole piece
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if size + len(line) > max_chars and current:
+            pieces.append("".join(current))
+            current = []
+            size = 0
+        current.append(line)
+        size += len(line)
+    if current:
+        pieces.append("".join(current))
+    return pieces
+
+class PromptBuilder:
+    """
+    Builds the merge analysis prompt within a token budget.
+
+    Patches are always packed first so the prompt grows with the diff; full
+    file contents are added only while budget remains. When even the patches
+    do not fit, the changes are summarized chunk by chunk in parallel (map)
+    and the summaries are combined into the final analysis (reduce).
+    """
+
+    def __init__(self, source_branch, target_branch, token_budget=DEFAULT_TOKEN_BUDGET,
+                 chunk_budget=DEFAULT_CHUNK_BUDGET, max_workers=DEFAULT_SUMMARY_WORKERS):
+        self.source_branch = source_branch
+        self.target_branch = target_branch
+        self.token_budget = token_budget
+        self.chunk_budget = min(chunk_budget, token_budget)
+        self.max_workers = max(1, max_workers)
+
+    def file_section(self, file, with_content=False):
+        section = (
+            f"\nFile: {file['filename']} ({file['status']})\n"
+            f"Changes: +{file['additions']}, -{file['deletions']}\n"
+        )
+        reason = file.get('skip_reason')
+        if reason:
+            section += f"Contents: {reason}\n"
+        # Patch-first analyses only have the contents of files loaded on demand
+        if with_content and reason != BINARY and file.get('source_content') is not None:
+            section += (
+                f"Current content in {self.source_branch}:\n"
+                f"{file['source_content'].text()}\n\n"
+                f"Content to be merged from {self.target_branch}:\n"
+                f"{file['target_content'].text()}\n\n"
+            )
+        section += "Changes to be applied:\n"
+        section += f"{file['diff'].patch()}\n\n"
+        return section
+
+    def context_instructions(self):
+        return f"""
+Only the changed hunks are included, without the full files. If you cannot judge the changes
+without the full content of some files, answer with nothing but one line per file:
+{CONTEXT_REQUEST} <file path>"""
+
+    def analysis_prompt(self, filenames, details, context_requests=False):
+        instructions = self.context_instructions() if context_requests else ""
+        return f"""Analyze these changes. We want to merge from '{self.target_branch}' into '{self.source_branch}'.
+The changes will update '{self.source_branch}' to match '{self.target_branch}'.
+
+Changed files:
+{filenames}
+
+Detailed changes:
+{details}
+
+Please provide:
+1. A summary of what changes will be applied to '{self.source_branch}'
+2. Potential risks or issues with this merge
+3. Testing recommendations after merge
+4. Review focus areas
+
+Focus on how these changes will fix/update the source branch.{instructions}"""
+
+    def summary_prompt(self, details):
+        return f"""Summarize this part of a change set that will be merged from '{self.target_branch}' into '{self.source_branch}'.
+For every file, state what changed, anything that looks risky, and what should be tested or reviewed.
+Be concise and keep file names.
+
+{details}"""
+
+    def reduce_prompt(self, filenames, summaries):
+        details = "\n\n".join(f"Part {index + 1}:\n{summary}" for index, summary in enumerate(summaries))
+        return self.analysis_prompt(filenames, f"(Summaries of the changes, the full diff is too large)\n{details}")
+
+    def file_prompt(self, file, context_requests=False):
+        """
+        Prompt for the findings on a single file, in the FINDING_SECTIONS layout.
+        With context_requests, the model may ask for the file's full contents instead.
+        """
+        # Contents are measured by their stored size and only loaded when they fit
+        with_content = estimate_tokens(self.file_section(file)) + self.content_cost(file) <= self.chunk_budget
+        details = split_text(self.file_section(file, with_content), self.chunk_budget)[0]
+        headings = "\n".join(f"{section}:" for section in FINDING_SECTIONS)
+        return f"""Analyze this change to a single file that is about to be merged.
+Answer with exactly these headings, each followed by a few short bullet points:
+{headings}
+
+{details}{self.context_instructions() if context_requests else ""}"""
+
+    def parse_finding(self, text):
+        """Split a per-file finding into its sections; unrecognised text goes to the summary"""
+        sections = {section: [] for section in FINDING_SECTIONS}
+        current = FINDING_SECTIONS[0]
+        for line in text.splitlines():
+            heading = line.strip().strip('*#').strip().rstrip(':').strip()
+            if heading in sections:
+                current = heading
+                continue
+            if line.strip():
+                sections[current].append(line.rstrip())
+        return sections
+
+    def combine_findings(self, findings):
+        """Assemble per-file findings [(filename, text)] into the four-part branch report"""
+        titles = (
+            f"1. A summary of what changes will be applied to '{self.source_branch}'",
+            "2. Potential risks or issues with this merge",
+            "3. Testing recommendations after merge",
+            "4. Review focus areas"
+        )
+        parsed = [(filename, self.parse_finding(text)) for filename, text in findings]
+        report = []
+        for title, section in zip(titles, FINDING_SECTIONS):
+            report.append(title)
+            for filename, sections in parsed:
+                if sections[section]:
+                    report.append(f"{filename}:")
+                    report.extend(sections[section])
+            report.append("")
+        return "\n".join(report)
+
+    def pack(self, changed_files, context_requests=False):
+        """
+        Return the detailed changes text for a single prompt, or None when the
+        patches alone exceed the budget.
+        """
+        files = [f for f in changed_files if f['diff'].has_patch()]
+        overhead = estimate_tokens(self.analysis_prompt([f['filename'] for f in changed_files], "", context_requests))
+        used = overhead + sum(estimate_tokens(self.file_section(f)) for f in files)
+        if used > self.token_budget:
+            return None
+
+        # Spend what is left on full contents, smallest files first
+        with_content = set()
+        for index in sorted(range(len(files)), key=lambda i: self.content_cost(files[i])):
+            cost = self.content_cost(files[index])
+            if used + cost > self.token_budget:
+                break
+            with_content.add(index)
+            used += cost
+
+        return "".join(self.file_section(f, index in with_content) for index, f in enumerate(files))
+
+    def content_cost(self, file):
+        return estimate_tokens(file.get('source_content')) + estimate_tokens(file.get('target_content'))
+
+    def chunks(self, changed_files):
+        """Group patch sections into chunks of at most chunk_budget tokens"""
+        chunks = []
+        current = []
+        size = 0
+        for file in changed_files:
+            if not file['diff'].has_patch():
+                continue
+            for piece in split_text(self.file_section(file), self.chunk_budget):
+                cost = estimate_tokens(piece)
+                if size + cost > self.chunk_budget and current:
+                    chunks.append("".join(current))
+                    current = []
+                    size = 0
+                current.append(piece)
+                size += cost
+        if current:
+            chunks.append("".join(current))
+        return chunks
+
+    def summarize(self, texts, generate, progress=None):
+        """Map step: summarize every text concurrently, keeping their order"""
+        total = len(texts)
+        done = [0]
+        lock = threading.Lock()
+
+        def summarize_one(text):
+            summary = generate(self.summary_prompt(text))
+            with lock:
+                done[0] += 1
+                count = done[0]
+            if progress:
+                progress(f"Summarized part {count}/{total}")
+            return summary
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(summarize_one, texts))
+
+    def build(self, changed_files, generate, progress=None, context_requests=False):
+        """
+        Return the final analysis prompt. generate(prompt) -> text is only
+        called for the map-reduce path when the diff is over budget.
+        With context_requests, a prompt that fits may ask the model to request
+        full file contents with CONTEXT_REQUEST lines instead of answering.
+        """
+        filenames = [f['filename'] for f in changed_files]
+        details = self.pack(changed_files, context_requests)
+        if details is not None:
+            return self.analysis_prompt(filenames, details, context_requests)
+
+        if progress:
+            progress("Diff exceeds the prompt budget, summarizing in parts...")
+        summaries = self.summarize(self.chunks(changed_files), generate, progress)
+
+        # Summaries of a very large diff may still not fit, reduce them further
+        prompt = self.reduce_prompt(filenames, summaries)
+        while estimate_tokens(prompt) > self.token_budget and len(summaries) > 1:
+            groups = split_text("\n\n".join(summaries), self.chunk_budget)
+            if len(groups) >= len(summaries):
+                break
+            summaries = self.summarize(groups, generate, progress)
+            prompt = self.reduce_prompt(filenames, summaries)
+        return prompt
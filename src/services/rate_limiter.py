@@ -0,0 +1,187 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+
+# Request priorities, lower runs first
+INTERACTIVE = 0
+BULK = 1
+
+# Requests in flight at once when GitHub is not pushing back
+DEFAULT_MAX_CONCURRENCY = 16
+# Share of the hourly budget that bulk requests leave for interactive ones
+BULK_RESERVE = 0.1
+# Wait after a secondary rate limit that came without Retry-After (seconds)
+SECONDARY_LIMIT_BACKOFF = 60
+# Rate-limited requests are retried this often, and only if the wait is short enough (seconds)
+MAX_RATE_LIMIT_RETRIES = 3
+MAX_RETRY_DELAY = 120
+
+_priority = threading.local()
+
+def current_priority():
+    return getattr(_priority, 'value', INTERACTIVE)
+
+@contextmanager
+def bulk_requests():
+    """Run the GitHub requests made by this thread inside the block at bulk priority"""
+    previous = current_priority()
+    _priority.value = BULK
+    try:
+        yield
+    finally:
+        _priority.value = previous
+
+def resource_for(url):
+    """The rate limit bucket GitHub charges a request URL to"""
+    path = urlparse(url).path
+    if path.startswith("/graphql"):
+        return 'graphql'
+    if path.startswith("/search"):
+        return 'search'
+    return 'core'
+
+class RateLimitScheduler:
+    """
+    Admission control for every request made with one GitHub token.
+
+    Requests wait for a slot in priority order, interactive before bulk.
+    The number of slots follows GitHub's feedback: it is halved on a rate
+    limit response and grows back by one after each run of successful
+    requests. The primary budget is tracked per resource from the
+    X-RateLimit headers. Bulk requests stop at BULK_RESERVE of the budget
+    until it resets, and all requests pause for Retry-After after a
+    secondary limit.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, bulk_reserve=BULK_RESERVE):
+        self.max_concurrency = max(1, max_concurrency)
+        self.bulk_reserve = bulk_reserve
+        self.condition = threading.Condition()
+        self.concurrency = self.max_concurrency
+        self.active = 0
+        self.successes = 0
+        self.waiting = []
+        self.counter = itertools.count()
+        self.paused_until = 0
+        self.limits = {}  # resource -> {'limit', 'remaining', 'reset'}
+        self.rate_limited = 0
+
+    def delay_for(self, priority, resource, now):
+        delay = self.paused_until - now
+        limits = self.limits.get(resource)
+        if priority == BULK and limits and limits['remaining'] < limits['limit'] * self.bulk_reserve:
+            delay = max(delay, limits['reset'] - now)
+        return delay
+
+    def acquire(self, priority, resource):
+        with self.condition:
+            ticket = (priority, next(self.counter))
+            heapq.heappush(self.waiting, ticket)
+            try:
+                while True:
+                    delay = self.delay_for(priority, resource, time.time())
+                    if delay <= 0 and self.waiting[0] == ticket and self.active < self.concurrency:
+                        break
+                    # Wake up periodically, pauses end without anyone notifying
+                    self.condition.wait(min(delay, 1.0) if delay > 0 else 1.0)
+            finally:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+            self.active += 1
+            self.condition.notify_all()
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self, resource='core'):
+        self.acquire(current_priority(), resource)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record(self, response):
+        """
+        Update the budget from a response. Returns the number of seconds to
+        wait before retrying when the response is a rate limit, otherwise None.
+        """
+        headers = response.headers
+        now = time.time()
+        remaining = headers.get('X-RateLimit-Remaining')
+        retry_after = headers.get('Retry-After')
+        limited = response.status_code == 429 or (
+            response.status_code == 403 and (
+                retry_after is not None or remaining == '0' or 'rate limit' in response.text.lower()
+            )
+        )
+
+        with self.condition:
+            if remaining is not None:
+                resource = headers.get('X-RateLimit-Resource', resource_for(response.url))
+                self.limits[resource] = {
+                    'limit': int(headers.get('X-RateLimit-Limit', 0)),
+                    'remaining': int(remaining),
+                    'reset': int(headers.get('X-RateLimit-Reset', now))
+                }
+
+            if not limited:
+                # Additive increase, one more slot per full round of successes
+                self.successes += 1
+                if self.successes >= self.concurrency and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self.successes = 0
+                return None
+
+            if retry_after is not None and retry_after.isdigit():
+                delay = int(retry_after)
+            elif remaining == '0':
+                delay = int(headers.get('X-RateLimit-Reset', now)) - now
+            else:
+                delay = SECONDARY_LIMIT_BACKOFF
+            delay = max(delay, 1)
+
+            self.paused_until = max(self.paused_until, now + delay)
+            self.concurrency = max(1, self.concurrency // 2)
+            self.successes = 0
+            self.rate_limited += 1
+            self.condition.notify_all()
+            return delay
+
+    def budget(self):
+        """Snapshot of the known budgets and the scheduler state, for display"""
+        with self.condition:
+            return {
+                'limits': {resource: dict(limits) for resource, limits in self.limits.items()},
+                'concurrency': self.concurrency,
+                'active': self.active,
+                'waiting': len(self.waiting),
+                'paused_for': max(0, self.paused_until - time.time()),
+                'rate_limited': self.rate_limited
+            }
+
+class ScheduledAdapter(HTTPAdapter):
+    """Transport adapter that sends every request through a RateLimitScheduler"""
+
+    def __init__(self, scheduler, **kwargs):
+        self.scheduler = scheduler
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        resource = resource_for(request.url)
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            with self.scheduler.slot(resource):
+                response = super().send(request, **kwargs)
+            delay = self.scheduler.record(response)
+            if delay is None or delay > MAX_RETRY_DELAY or attempt == MAX_RATE_LIMIT_RETRIES:
+                return response
+            # The scheduler holds every request back until the limit lifts
+            response.close()
+        return response
@@ -0,0 +1,121 @@
+import hashlib
+
+from src.services.conflict_detector import merge_lines, is_binary
+
+# Tree entry mode of submodules, whose "content" is a commit and cannot be merged
+SUBMODULE_MODE = '160000'
+
+def git_blob_sha(data):
+    """The SHA Git assigns to a blob with this content"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+class TreeMerger:
+    """
+    Merges several source trees into a target tree in memory, the way an
+    octopus merge does.
+
+    Trees map paths to (mode, sha). Each source is merged against its own
+    merge base with the target; files changed on both sides are merged line by
+    line. A source that conflicts anywhere is left out entirely, so the merged
+    tree only ever contains clean merges. Contents created by line merges are
+    kept in new_blobs, keyed by the SHA Git will give them.
+    """
+
+    def __init__(self, read_blobs):
+        # read_blobs(shas) -> {sha: bytes}
+        self.read_blobs = read_blobs
+        self.new_blobs = {}
+
+    def read(self, shas):
+        blobs = {sha: self.new_blobs[sha] for sha in shas if sha in self.new_blobs}
+        missing = [sha for sha in shas if sha and sha not in blobs]
+        if missing:
+            blobs.update(self.read_blobs(missing))
+        return blobs
+
+    def merge_content(self, blobs, base, current, theirs):
+        """Line-merge one file; returns the merged (mode, sha) or None on conflict"""
+        if SUBMODULE_MODE in (current[0], theirs[0]):
+            return None
+        contents = [blobs.get(entry[1], b'') if entry else b'' for entry in (base, current, theirs)]
+        if any(is_binary(content) for content in contents):
+            return None
+        try:
+            base_lines, current_lines, theirs_lines = (
+                content.decode('utf-8').splitlines(keepends=True) for content in contents
+            )
+        except UnicodeDecodeError:
+            return None
+
+        merged, conflicts = merge_lines(base_lines, current_lines, theirs_lines)
+        if conflicts:
+            return None
+        data = ''.join(merged).encode('utf-8')
+        sha = git_blob_sha(data)
+        self.new_blobs[sha] = data
+        # Keep a mode change made on either side
+        mode = theirs[0] if base and current[0] == base[0] else current[0]
+        return mode, sha
+
+    def merge_source(self, tree, base_tree, source_tree):
+        """
+        Merge one source into tree. Returns ({path: entry or None} updates,
+        conflicting paths); tree itself is left untouched.
+        """
+        updates = {}
+        conflicts = []
+        to_merge = []
+        for path in base_tree.keys() | source_tree.keys():
+            base, theirs = base_tree.get(path), source_tree.get(path)
+            if base == theirs:
+                continue
+            current = tree.get(path)
+            if theirs == current:
+                continue
+            if current == base:
+                updates[path] = theirs
+            elif current is None or theirs is None:
+                conflicts.append(path)
+            else:
+                to_merge.append((path, base, current, theirs))
+
+        if to_merge and not conflicts:
+            blobs = self.read([entry[1] for item in to_merge for entry in item[1:] if entry])
+            for path, base, current, theirs in to_merge:
+                merged = self.merge_content(blobs, base, current, theirs)
+                if merged is None:
+                    conflicts.append(path)
+                else:
+                    updates[path] = merged
+
+        return updates, sorted(conflicts)
+
+    def merge(self, target_tree, sources):
+        """
+        Merge sources, a list of (name, base_tree, source_tree), into target_tree in order.
+        Returns (merged tree, merged source names, {conflicting source name: paths}).
+        """
+        tree = dict(target_tree)
+        merged = []
+        conflicting = {}
+        for name, base_tree, source_tree in sources:
+            updates, conflicts = self.merge_source(tree, base_tree, source_tree)
+            if conflicts:
+                conflicting[name] = conflicts
+                continue
+            for path, entry in updates.items():
+                if entry is None:
+                    tree.pop(path, None)
+                else:
+                    tree[path] = entry
+            merged.append(name)
+        return tree, merged, conflicting
+
+def tree_changes(target_tree, merged_tree):
+    """Entries of merged_tree that differ from target_tree, with None for deleted paths"""
+    changes = {}
+    for path in target_tree.keys() | merged_tree.keys():
+        entry = merged_tree.get(path)
+        if entry != target_tree.get(path):
+            changes[path] = entry
+    return changes
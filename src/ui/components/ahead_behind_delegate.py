@@ -0,0 +1,27 @@
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtGui import QColor
+from PyQt5.QtCore import Qt
+from src.ui.components.list_models import AHEAD_BEHIND_ROLE
+
+class AheadBehindDelegate(QStyledItemDelegate):
+    """Draws the branch name with "ahead N / behind M" right-aligned next to it"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.count_color = QColor("#6A737D")
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        counts = index.data(AHEAD_BEHIND_ROLE)
+        if not counts:
+            return
+
+        ahead, behind = counts
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.setPen(option.palette.highlightedText().color())
+        else:
+            painter.setPen(self.count_color)
+        rect = option.rect.adjusted(0, 0, -6, 0)
+        painter.drawText(rect, Qt.AlignRight | Qt.AlignVCenter, f"ahead {ahead} / behind {behind}")
+        painter.restore()
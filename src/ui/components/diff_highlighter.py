@@ -1,30 +1,20 @@
 # File: /github-merge-assistant/github-merge-assistant/src/ui/components/diff_highlighter.py
 
-from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QBrush
+from PyQt5.QtGui import QColor
 
-class DiffHighlighter(QSyntaxHighlighter):
-    def __init__(self, parent=None):
-        super().__init__(parent)
+from src.services.diff_model import PLAIN, ADDED, REMOVED, HUNK_HEADER, SECTION_HEADER
 
-    def highlightBlock(self, text):
-        format_add = QTextCharFormat()
-        format_add.setBackground(QBrush(QColor("#E6FFED")))
-        format_add.setForeground(QBrush(QColor("#24292E")))
-
-        format_del = QTextCharFormat()
-        format_del.setBackground(QBrush(QColor("#FFEEF0")))
-        format_del.setForeground(QBrush(QColor("#24292E")))
-
-        format_header = QTextCharFormat()
-        format_header.setBackground(QBrush(QColor("#F1F8FF")))
-        format_header.setForeground(QBrush(QColor("#0366D6")))
-
-        # Highlight diff headers
-        if text.startswith("@@") and text.find("@@", 2) > 0:
-            self.setFormat(0, len(text), format_header)
-        # Highlight additions
-        elif text.startswith("+"):
-            self.setFormat(0, len(text), format_add)
-        # Highlight deletions
-        elif text.startswith("-"):
-            self.setFormat(0, len(text), format_del)
\ No newline at end of file
+# Background and text colors per kind, shared by every diff view
+BACKGROUNDS = {
+    ADDED: QColor("#E6FFED"),
+    REMOVED: QColor("#FFEEF0"),
+    HUNK_HEADER: QColor("#F1F8FF"),
+    SECTION_HEADER: QColor("#F6F8FA")
+}
+FOREGROUNDS = {
+    PLAIN: QColor("#24292E"),
+    ADDED: QColor("#24292E"),
+    REMOVED: QColor("#24292E"),
+    HUNK_HEADER: QColor("#0366D6"),
+    SECTION_HEADER: QColor("#6F42C1")
+}
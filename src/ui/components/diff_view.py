@@ -0,0 +1,214 @@
+from array import array
+from bisect import bisect_right
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QAbstractScrollArea, QApplication, QMenu
+from PyQt5.QtGui import QPainter, QFontDatabase, QKeySequence
+from src.services.diff_model import LineBuffer
+from src.ui.components.diff_highlighter import BACKGROUNDS, FOREGROUNDS
+
+# Left padding of the text (pixels)
+TEXT_MARGIN = 4
+TAB = "    "
+
+class DiffView(QAbstractScrollArea):
+    """
+    Read-only diff viewer that scales to any diff size.
+
+    The view keeps no text of its own, it shows line ranges of LineBuffers,
+    usually the DiffModel of a compare, whose lines were indexed and
+    classified when the model was built. paintEvent reads only the lines
+    inside the viewport, using the colors shared by all diff views.
+    Scrolling is by line vertically and by pixel horizontally. Whole lines
+    are selected with the mouse and copied with the usual shortcut.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.ranges = []  # (buffer, first line, end line)
+        self.starts = array('Q')  # view line each range starts at
+        self.total = 0
+        self.widest = 0
+        self.anchor = None  # view line the selection started at
+        self.cursor = None  # view line the selection extends to
+        self.verticalScrollBar().setSingleStep(1)
+        self.setFocusPolicy(Qt.StrongFocus)
+
+    def clear(self):
+        self.ranges = []
+        self.starts = array('Q')
+        self.total = 0
+        self.widest = 0
+        self.anchor = self.cursor = None
+        self.update_scrollbars()
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.viewport().update()
+
+    def set_text(self, text):
+        self.clear()
+        self.append_text(text)
+
+    def append_text(self, text, classify=True):
+        self.append_lines(LineBuffer(text, classify))
+
+    def append_lines(self, buffer, first=0, end=None):
+        """Show lines first to end (exclusive) of buffer after the current ones"""
+        end = buffer.line_count() if end is None else end
+        if first >= end:
+            return
+        self.ranges.append((buffer, first, end))
+        self.starts.append(self.total)
+        self.total += end - first
+        self.widest = max(self.widest, buffer.widest)
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def to_plain_text(self):
+        return self.text_of(0, self.total)
+
+    def text_of(self, first, end):
+        """Text of view lines first to end (exclusive), one slice per range"""
+        pieces = []
+        index = bisect_right(self.starts, first) - 1
+        while first < end:
+            buffer, start, stop = self.ranges[index]
+            begin = start + first - self.starts[index]
+            count = min(stop - begin, end - first)
+            pieces.append(buffer.span(begin, begin + count))
+            first += count
+            index += 1
+        return "\n".join(pieces)
+
+    def selection(self):
+        """The selected view lines as (first, end), or None"""
+        if self.anchor is None:
+            return None
+        return min(self.anchor, self.cursor), max(self.anchor, self.cursor) + 1
+
+    def selected_text(self):
+        selection = self.selection()
+        return self.text_of(*selection) if selection else ""
+
+    def select(self, anchor, cursor):
+        self.anchor, self.cursor = anchor, cursor
+        self.viewport().update()
+
+    def copy(self):
+        if self.selection():
+            QApplication.clipboard().setText(self.selected_text())
+
+    def line_count(self):
+        return self.total
+
+    def locate(self, line):
+        """The buffer holding a view line and the line's index in it"""
+        index = bisect_right(self.starts, line) - 1
+        buffer, first, _ = self.ranges[index]
+        return buffer, first + line - self.starts[index]
+
+    def line_text(self, line):
+        buffer, index = self.locate(line)
+        return buffer.line(index)
+
+    def line_at(self, y):
+        """The view line at a viewport y coordinate, clamped to the lines shown"""
+        line = self.verticalScrollBar().value() + y // self.fontMetrics().height()
+        return min(max(0, line), self.total - 1)
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.fontMetrics().height())
+
+    def update_scrollbars(self):
+        page = self.visible_lines()
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.line_count() - page))
+        vertical.setPageStep(page)
+
+        horizontal = self.horizontalScrollBar()
+        width = self.widest * self.fontMetrics().horizontalAdvance("M") + 2 * TEXT_MARGIN
+        horizontal.setRange(0, max(0, width - self.viewport().width()))
+        horizontal.setPageStep(self.viewport().width())
+        horizontal.setSingleStep(self.fontMetrics().horizontalAdvance("M"))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        metrics = self.fontMetrics()
+        line_height = metrics.height()
+        char_width = metrics.horizontalAdvance("M")
+        width = self.viewport().width()
+
+        # Only the columns in view are drawn, long lines are never laid out whole
+        x_offset = self.horizontalScrollBar().value()
+        first_column = max(0, (x_offset - TEXT_MARGIN) // char_width)
+        columns = width // char_width + 2
+        x = TEXT_MARGIN + first_column * char_width - x_offset
+
+        selected_first, selected_end = self.selection() or (0, 0)
+        palette = self.palette()
+
+        first = self.verticalScrollBar().value()
+        last = min(self.line_count(), first + self.visible_lines() + 1)
+        for row, line in enumerate(range(first, last)):
+            y = row * line_height
+            buffer, index = self.locate(line)
+            kind = buffer.kind(index)
+            if selected_first <= line < selected_end:
+                painter.fillRect(0, y, width, line_height, palette.highlight())
+                painter.setPen(palette.highlightedText().color())
+            else:
+                if kind in BACKGROUNDS:
+                    painter.fillRect(0, y, width, line_height, BACKGROUNDS[kind])
+                painter.setPen(FOREGROUNDS[kind])
+            text = buffer.line(index).replace("\t", TAB)[first_column:first_column + columns]
+            painter.drawText(x, y + metrics.ascent(), text)
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton or not self.total:
+            return super().mousePressEvent(event)
+        line = self.line_at(event.pos().y())
+        if event.modifiers() & Qt.ShiftModifier and self.anchor is not None:
+            self.select(self.anchor, line)
+        else:
+            self.select(line, line)
+
+    def mouseMoveEvent(self, event):
+        if not event.buttons() & Qt.LeftButton or self.anchor is None:
+            return super().mouseMoveEvent(event)
+        # Dragging past the top or bottom edge scrolls
+        y = event.pos().y()
+        vertical = self.verticalScrollBar()
+        if y < 0:
+            vertical.setValue(vertical.value() - 1)
+        elif y >= self.viewport().height():
+            vertical.setValue(vertical.value() + 1)
+        self.select(self.anchor, self.line_at(y))
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copy()
+        elif event.matches(QKeySequence.SelectAll) and self.total:
+            self.select(0, self.total - 1)
+        else:
+            super().keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+        menu = QMenu(self)
+        copy_action = menu.addAction("Copy")
+        copy_action.setShortcut(QKeySequence.Copy)
+        copy_action.setEnabled(self.selection() is not None)
+        copy_all_action = menu.addAction("Copy All")
+        action = menu.exec_(event.globalPos())
+        if action is copy_action:
+            self.copy()
+        elif action is copy_all_action:
+            QApplication.clipboard().setText(self.to_plain_text())
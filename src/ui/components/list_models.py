@@ -0,0 +1,167 @@
+from array import array
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel
+from PyQt5.QtWidgets import QCompleter
+
+# (ahead, behind) counts of a branch against the selected target, None until known
+AHEAD_BEHIND_ROLE = Qt.UserRole + 1
+
+class BranchStore:
+    """
+    Compact column store for branch listings.
+
+    Names are kept once in a list, head SHAs as 20 raw bytes each and the
+    protection flags in a bytearray, so 50k branches stay a few MB.
+    Ahead/behind counts against the target live in two int arrays, -1 when unknown.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.shas = bytearray()
+        self.protected = bytearray()
+        self.ahead = array('i')
+        self.behind = array('i')
+
+    def __len__(self):
+        return len(self.names)
+
+    def extend(self, branches):
+        for branch in branches:
+            self.names.append(branch['name'])
+            self.shas += bytes.fromhex(branch['sha'])
+            self.protected.append(1 if branch['protected'] else 0)
+            self.ahead.append(-1)
+            self.behind.append(-1)
+
+    def clear(self):
+        self.names = []
+        self.shas = bytearray()
+        self.protected = bytearray()
+        self.ahead = array('i')
+        self.behind = array('i')
+
+    def set_ahead_behind(self, counts):
+        self.ahead = array('i', (ahead for ahead, _ in counts))
+        self.behind = array('i', (behind for _, behind in counts))
+
+    def ahead_behind(self, row):
+        if self.ahead[row] < 0:
+            return None
+        return self.ahead[row], self.behind[row]
+
+    def sha(self, row):
+        return self.shas[row * 20:(row + 1) * 20].hex()
+
+    def branch(self, row):
+        return {
+            'name': self.names[row],
+            'sha': self.sha(row),
+            'protected': bool(self.protected[row])
+        }
+
+class BranchListModel(QAbstractListModel):
+    """List model over a BranchStore, shared by every branch picker"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = BranchStore()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.store)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.store.names[row]
+        if role == Qt.UserRole:
+            return self.store.branch(row)
+        if role == AHEAD_BEHIND_ROLE:
+            return self.store.ahead_behind(row)
+        return None
+
+    def append_branches(self, branches):
+        if not branches:
+            return
+        first = len(self.store)
+        self.beginInsertRows(QModelIndex(), first, first + len(branches) - 1)
+        self.store.extend(branches)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.store.clear()
+        self.endResetModel()
+
+    def names(self):
+        return self.store.names
+
+    def heads(self):
+        return [(name, self.store.sha(row)) for row, name in enumerate(self.store.names)]
+
+    def set_ahead_behind(self, counts):
+        """Store (ahead, behind) for every row, in row order; (-1, -1) marks unknown"""
+        if len(counts) != len(self.store):
+            return
+        self.store.set_ahead_behind(counts)
+        if counts:
+            self.dataChanged.emit(self.index(0), self.index(len(counts) - 1), [AHEAD_BEHIND_ROLE])
+
+class RepoListModel(QAbstractListModel):
+    """List model over the repository dicts produced by GitHubRepoLoader"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.repos = []
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.repos)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        repo = self.repos[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return repo['full_name']
+        if role == Qt.ToolTipRole:
+            return repo['description']
+        if role == Qt.UserRole:
+            return repo
+        return None
+
+    def append_repos(self, repos):
+        if not repos:
+            return
+        first = len(self.repos)
+        self.beginInsertRows(QModelIndex(), first, first + len(repos) - 1)
+        self.repos.extend(repos)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.repos = []
+        self.endResetModel()
+
+    def repo(self, row):
+        return self.repos[row]
+
+def create_filter_proxy(model, parent=None):
+    """Case-insensitive substring filter over model, used for type-ahead"""
+    proxy = QSortFilterProxyModel(parent)
+    proxy.setSourceModel(model)
+    proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+    return proxy
+
+def create_filter_completer(model, parent=None):
+    """Completer that matches anywhere in the name and shows its matches in a virtualized popup"""
+    completer = QCompleter(model, parent)
+    completer.setCaseSensitivity(Qt.CaseInsensitive)
+    completer.setFilterMode(Qt.MatchContains)
+    completer.setCompletionMode(QCompleter.PopupCompletion)
+    completer.popup().setUniformItemSizes(True)
+    return completer
@@ -0,0 +1,67 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton,
+    QHBoxLayout, QHeaderView
+)
+from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtCore import Qt
+
+class ConflictMatrixDialog(QDialog):
+    def __init__(self, parent=None, result=None):
+        super().__init__(parent)
+        self.setWindowTitle("Conflict Matrix")
+        self.setMinimumSize(600, 400)
+
+        layout = QVBoxLayout()
+
+        branches = result['branches']
+        matrix = result['matrix']
+
+        info_label = QLabel(
+            f"Pairwise merge conflicts between <b>{branches[0]}</b> (target) and the "
+            f"{len(branches) - 1} selected source branches. Hover a red cell for the conflicting files."
+        )
+        info_label.setWordWrap(True)
+        layout.addWidget(info_label)
+
+        # Grid of branch pairs, the target is the first row and column
+        table = QTableWidget(len(branches), len(branches))
+        table.setHorizontalHeaderLabels(branches)
+        table.setVerticalHeaderLabels(branches)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+
+        clean_brush = QBrush(QColor("#E6FFED"))
+        conflict_brush = QBrush(QColor("#FFEEF0"))
+        for row in range(len(branches)):
+            for column in range(len(branches)):
+                files = matrix[row][column]
+                if files is None:
+                    item = QTableWidgetItem("-")
+                elif files:
+                    item = QTableWidgetItem(str(len(files)))
+                    item.setBackground(conflict_brush)
+                    item.setToolTip("\n".join(files))
+                else:
+                    item = QTableWidgetItem("✓")
+                    item.setBackground(clean_brush)
+                item.setTextAlignment(Qt.AlignCenter)
+                table.setItem(row, column, item)
+        layout.addWidget(table)
+
+        # Suggested order
+        order_text = " → ".join(result['merge_order'])
+        order_label = QLabel(
+            f"Suggested merge order: <b>{order_text}</b><br>"
+            f"Merges expected to conflict in this order: {result['conflicting_merges']}"
+        )
+        order_label.setWordWrap(True)
+        layout.addWidget(order_label)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.accept)
+        button_layout.addWidget(self.close_button)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
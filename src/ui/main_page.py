@@ -1,23 +1,73 @@
+import time
+
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, 
     QPushButton, QListWidget, QTextEdit, QTabWidget, QProgressBar, 
-    QMessageBox, QFormLayout, QDialog, QListWidgetItem
+    QMessageBox, QFormLayout, QDialog, QListWidgetItem, QListView,
+    QLineEdit, QAbstractItemView
 )
-from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont, QTextCursor
+from PyQt5.QtCore import Qt, QTimer
 from src.services.github_repo_loader import GitHubRepoLoader
 from src.services.github_branch_loader import GitHubBranchLoader
+from src.services.github_graphql_branch_loader import GitHubGraphQLBranchLoader
 from src.services.github_merge_analyzer import GitHubMergeAnalyzer
 from src.services.github_merge_executor import GitHubMergeExecutor
-from src.ui.components.diff_highlighter import DiffHighlighter
+from src.services.local_mirror import LocalMirror
+from src.services.local_mirror_analyzer import LocalMirrorAnalyzer
+from src.services.ahead_behind_loader import AheadBehindLoader
+from src.services.conflict_matrix import ConflictMatrixBuilder
+from src.services.content_loader import ContentLoader
+from src.services.content_policy import BINARY
+from src.ui.components.diff_view import DiffView
+from src.ui.components.list_models import (
+    BranchListModel, RepoListModel, create_filter_proxy, create_filter_completer
+)
+from src.ui.components.ahead_behind_delegate import AheadBehindDelegate
 from src.ui.merge_dialog import MergeDialog
+from src.ui.conflict_matrix_dialog import ConflictMatrixDialog
+
+# Number of source branches analyzed at the same time
+MAX_PARALLEL_ANALYSES = 4
+
+# Branch listing backends, selectable through MainPage(branch_backend=...)
+BRANCH_LOADERS = {
+    'rest': GitHubBranchLoader,
+    'graphql': GitHubGraphQLBranchLoader
+}
+
+# Analysis backends, selectable through MainPage(analysis_backend=...)
+ANALYZERS = {
+    'github': GitHubMergeAnalyzer,
+    'mirror': LocalMirrorAnalyzer
+}
 
 class MainPage(QWidget):
-    def __init__(self, github_token, gemini_api_key):
+    def __init__(self, github_session, gemini_api_key, max_parallel_analyses=MAX_PARALLEL_ANALYSES,
+                 branch_backend='rest', per_file_analysis=False, analysis_backend='github',
+                 ahead_behind=False, patch_first=False):
         super().__init__()
-        self.github_token = github_token
+        self.github_session = github_session
         self.gemini_api_key = gemini_api_key
+        self.max_parallel_analyses = max(1, max_parallel_analyses)
+        self.branch_backend = branch_backend
+        self.per_file_analysis = per_file_analysis
+        self.analysis_backend = analysis_backend
+        self.patch_first = patch_first
+        # Ahead/behind counts need a local mirror of the repository
+        self.ahead_behind = ahead_behind
+        self.ahead_behind_loader = None
+        self.content_loader = None
+        self.selected_file = None
+        self.branches_complete = False
         self.current_repo = None
+        self.current_analysis_results = []
+        self.analysis_errors = []
+        self.analysis_cursors = {}
+        self.streamed_branches = set()
+        self.pending_branches = []
+        self.analysis_target_branch = None
+        self.active_analyzers = {}
         self.init_ui()
         self.load_repos()
 
@@ -35,12 +85,24 @@ class MainPage(QWidget):
         self.status_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
         header_layout.addWidget(self.status_label)
 
+        # Remaining API budget of the token, refreshed from the shared scheduler
+        self.budget_label = QLabel()
+        self.budget_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.budget_label.setStyleSheet("color: #6A737D;")
+        header_layout.addWidget(self.budget_label)
+
+        self.budget_timer = QTimer(self)
+        self.budget_timer.setInterval(1000)
+        self.budget_timer.timeout.connect(self.update_budget)
+        self.budget_timer.start()
+
         main_layout.addLayout(header_layout)
 
         repo_layout = QHBoxLayout()
         repo_layout.addWidget(QLabel("Repository:"))
 
-        self.repo_combo = QComboBox()
+        self.repo_model = RepoListModel(self)
+        self.repo_combo = self.create_picker_combo(self.repo_model)
         self.repo_combo.setMinimumWidth(300)
         self.repo_combo.currentIndexChanged.connect(self.on_repo_selected)
         repo_layout.addWidget(self.repo_combo)
@@ -56,13 +118,38 @@ class MainPage(QWidget):
         branch_form = QFormLayout()
         branch_form.setSpacing(10)
 
-        self.target_branch_combo = QComboBox()
+        # Both branch pickers read the same model, every branch is stored once
+        self.branch_model = BranchListModel(self)
+
+        self.target_branch_combo = self.create_picker_combo(self.branch_model)
+        self.target_branch_combo.currentIndexChanged.connect(self.load_ahead_behind)
         branch_form.addRow("Target Branch:", self.target_branch_combo)
 
-        self.source_branches_list = QListWidget()
-        self.source_branches_list.setSelectionMode(QListWidget.ExtendedSelection)
+        self.branch_filter = QLineEdit()
+        self.branch_filter.setPlaceholderText("Filter branches...")
+        self.branch_filter.setClearButtonEnabled(True)
+        branch_form.addRow("", self.branch_filter)
+
+        # Debounce typing so large lists are filtered once per pause
+        self.branch_filter_timer = QTimer(self)
+        self.branch_filter_timer.setSingleShot(True)
+        self.branch_filter_timer.setInterval(150)
+        self.branch_filter_timer.timeout.connect(self.apply_branch_filter)
+        self.branch_filter.textChanged.connect(self.branch_filter_timer.start)
+
+        self.source_branches_proxy = create_filter_proxy(self.branch_model, self)
+        self.source_branches_list = QListView()
+        self.source_branches_list.setModel(self.source_branches_proxy)
+        self.source_branches_list.setUniformItemSizes(True)
+        self.source_branches_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.source_branches_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
         branch_form.addRow("Source Branches:", self.source_branches_list)
 
+        if self.ahead_behind:
+            self.ahead_behind_delegate = AheadBehindDelegate(self)
+            self.target_branch_combo.view().setItemDelegate(self.ahead_behind_delegate)
+            self.source_branches_list.setItemDelegate(self.ahead_behind_delegate)
+
         branch_form_widget = QWidget()
         branch_form_widget.setLayout(branch_form)
         branch_layout.addWidget(branch_form_widget)
@@ -72,6 +159,11 @@ class MainPage(QWidget):
         self.compare_button.clicked.connect(self.analyze_merge)
         branch_layout.addWidget(self.compare_button)
 
+        self.matrix_button = QPushButton("Conflict Matrix")
+        self.matrix_button.setEnabled(False)
+        self.matrix_button.clicked.connect(self.check_conflict_matrix)
+        branch_layout.addWidget(self.matrix_button)
+
         main_layout.addLayout(branch_layout)
 
         self.progress_bar = QProgressBar()
@@ -103,10 +195,11 @@ class MainPage(QWidget):
         self.diff_summary = QLabel()
         diff_layout.addWidget(self.diff_summary)
 
-        self.diff_text = QTextEdit()
-        self.diff_text.setReadOnly(True)
-        self.diff_text.setFont(QFont("Courier New", 10))
-        self.diff_highlighter = DiffHighlighter(self.diff_text.document())
+        # Virtualized, only the lines in view are laid out
+        self.diff_text = DiffView()
+        diff_font = QFont("Courier New", 10)
+        diff_font.setStyleHint(QFont.TypeWriter)
+        self.diff_text.setFont(diff_font)
         diff_layout.addWidget(self.diff_text)
 
         self.diff_widget.setLayout(diff_layout)
@@ -133,72 +226,160 @@ class MainPage(QWidget):
 
         self.setLayout(main_layout)
 
+    def create_picker_combo(self, model):
+        combo = QComboBox()
+        combo.setModel(model)
+        combo.setEditable(True)
+        combo.setInsertPolicy(QComboBox.NoInsert)
+        combo.setCompleter(create_filter_completer(model, combo))
+        combo.view().setUniformItemSizes(True)
+        return combo
+
+    def apply_branch_filter(self):
+        self.source_branches_proxy.setFilterFixedString(self.branch_filter.text())
+
+    def selected_source_branches(self):
+        indexes = self.source_branches_list.selectionModel().selectedRows()
+        return [index.data(Qt.DisplayRole) for index in sorted(indexes, key=lambda index: index.row())]
+
     def load_repos(self):
         self.status_label.setText("Loading repositories...")
-        self.repo_combo.clear()
-        self.source_branches_list.clear()
-        self.target_branch_combo.clear()
+        self.repo_model.clear()
+        self.branch_model.clear()
         self.compare_button.setEnabled(False)
+        self.matrix_button.setEnabled(False)
 
         self.progress_bar.show()
 
-        self.repo_loader = GitHubRepoLoader(self.github_token)
+        self.repo_loader = GitHubRepoLoader(self.github_session)
+        self.repo_loader.repos_page_loaded.connect(self.on_repos_page_loaded)
         self.repo_loader.repos_loaded.connect(self.on_repos_loaded)
         self.repo_loader.error_occurred.connect(self.on_error)
         self.repo_loader.start()
 
-    def on_repos_loaded(self, repos):
-        self.progress_bar.hide()
-        self.status_label.setText(f"Found {len(repos)} repositories")
+    def on_repos_page_loaded(self, repos):
+        # Ignore pages from a loader that a later refresh replaced
+        if self.sender() is not self.repo_loader:
+            return
+
+        self.repo_model.append_repos(repos)
+        self.status_label.setText(f"Loading repositories... {self.repo_model.rowCount()} so far")
 
-        self.repos = repos
+    def on_repos_loaded(self, repos):
+        if self.sender() is not self.repo_loader:
+            return
 
-        for repo in repos:
-            self.repo_combo.addItem(repo['full_name'], repo)
+        self.progress_bar.hide()
+        self.status_label.setText(f"Found {self.repo_model.rowCount()} repositories ({self.cache_status()})")
+
+    def update_budget(self):
+        budget = self.github_session.scheduler.budget()
+        parts = []
+        for resource, limits in sorted(budget['limits'].items()):
+            reset = time.strftime('%H:%M', time.localtime(limits['reset']))
+            parts.append(f"{resource} {limits['remaining']:,}/{limits['limit']:,} (resets {reset})")
+        if budget['paused_for'] > 0:
+            parts.append(f"rate limited, resuming in {budget['paused_for']:.0f}s")
+        elif budget['waiting']:
+            parts.append(f"{budget['waiting']} requests queued")
+        self.budget_label.setText("API: " + " · ".join(parts) if parts else "")
+
+    def cache_status(self):
+        stats = self.github_session.http_cache.stats()
+        return f"HTTP cache: {stats['hits']} hits, {stats['misses']} misses"
 
     def on_repo_selected(self, index):
         if index >= 0:
-            self.current_repo = self.repos[index]
+            self.current_repo = self.repo_model.repo(index)
             self.load_branches()
 
     def load_branches(self):
         if not self.current_repo:
             return
 
-        self.source_branches_list.clear()
-        self.target_branch_combo.clear()
+        self.branch_model.clear()
+        self.branches_complete = False
         self.compare_button.setEnabled(False)
+        self.matrix_button.setEnabled(False)
 
         self.progress_bar.show()
         self.status_label.setText(f"Loading branches for {self.current_repo['full_name']}...")
 
-        self.branch_loader = GitHubBranchLoader(self.github_token, self.current_repo['full_name'])
+        loader_class = BRANCH_LOADERS[self.branch_backend]
+        self.branch_loader = loader_class(self.github_session, self.current_repo['full_name'])
+        self.branch_loader.branches_page_loaded.connect(self.on_branches_page_loaded)
         self.branch_loader.branches_loaded.connect(self.on_branches_loaded)
         self.branch_loader.error_occurred.connect(self.on_error)
         self.branch_loader.start()
 
-    def on_branches_loaded(self, branches):
-        self.progress_bar.hide()
-        self.status_label.setText(f"Found {len(branches)} branches")
+    def on_branches_page_loaded(self, branches):
+        # Ignore pages from the loader of a previously selected repository
+        if self.sender() is not self.branch_loader:
+            return
 
-        self.branches = branches
+        self.branch_model.append_branches(branches)
 
-        self.target_branch_combo.clear()
-        self.source_branches_list.clear()
+        # Branches are usable as soon as the first page is in
+        self.compare_button.setEnabled(True)
+        self.matrix_button.setEnabled(True)
+        self.status_label.setText(
+            f"Loading branches for {self.current_repo['full_name']}... {self.branch_model.rowCount()} so far"
+        )
 
-        for branch in branches:
-            self.target_branch_combo.addItem(branch['name'])
-            self.source_branches_list.addItem(branch['name'])
+    def on_branches_loaded(self, branches):
+        if self.sender() is not self.branch_loader:
+            return
 
-        self.compare_button.setEnabled(True)
+        self.progress_bar.hide()
+        self.status_label.setText(
+            f"Found {self.branch_model.rowCount()} branches "
+            f"({self.branch_backend}: {self.branch_loader.request_count} requests "
+            f"in {self.branch_loader.elapsed:.2f}s, {self.cache_status()})"
+        )
+        self.compare_button.setEnabled(self.branch_model.rowCount() > 0)
+        self.matrix_button.setEnabled(self.branch_model.rowCount() > 0)
+        self.branches_complete = True
+        self.load_ahead_behind()
+
+    def load_ahead_behind(self):
+        """Count ahead/behind of every branch against the selected target from the local commit graph"""
+        if not self.ahead_behind or not self.branches_complete or not self.current_repo:
+            return
+        target_branch = self.target_branch_combo.currentText()
+        if not target_branch:
+            return
+
+        self.ahead_behind_loader = AheadBehindLoader(
+            LocalMirror(self.current_repo['full_name'], self.github_session.github_token),
+            self.branch_model.heads(),
+            target_branch
+        )
+        # Parented to the page so a replaced loader can finish in the background
+        self.ahead_behind_loader.setParent(self)
+        self.ahead_behind_loader.finished.connect(self.ahead_behind_loader.deleteLater)
+        self.ahead_behind_loader.counts_loaded.connect(self.on_ahead_behind_loaded)
+        self.ahead_behind_loader.error_occurred.connect(self.on_ahead_behind_error)
+        self.ahead_behind_loader.start()
+
+    def on_ahead_behind_loaded(self, target_branch, counts):
+        # Ignore counts for a target or repository that is no longer selected
+        if self.sender() is not self.ahead_behind_loader or not self.branches_complete:
+            return
+        if self.sender().mirror.repo_full_name != self.current_repo['full_name']:
+            return
+        self.branch_model.set_ahead_behind(counts)
+
+    def on_ahead_behind_error(self, error_message):
+        if self.sender() is not self.ahead_behind_loader:
+            return
+        self.status_label.setText(f"Ahead/behind counts unavailable: {error_message}")
 
     def analyze_merge(self):
-        selected_items = self.source_branches_list.selectedItems()
-        if not selected_items:
+        source_branches = self.selected_source_branches()
+        if not source_branches:
             QMessageBox.warning(self, "Invalid Selection", "Please select at least one source branch")
             return
 
-        source_branches = [item.text() for item in selected_items]
         target_branch = self.target_branch_combo.currentText()
 
         if target_branch in source_branches:
@@ -212,49 +393,103 @@ class MainPage(QWidget):
         self.merge_button.hide()
         self.results_tabs.hide()
 
+        self.diff_summary.clear()
+        self.diff_text.clear()
+        self.files_list.clear()
+        self.ai_analysis_text.clear()
+
         self.current_analysis_results = []
-        self.analyze_next_branch(source_branches, target_branch)
+        self.analysis_errors = []
+        self.streamed_branches = set()
+        self.analysis_cursors = {}
+        for source_branch in source_branches:
+            self.add_analysis_section(source_branch)
+
+        self.pending_branches = source_branches
+        self.analysis_target_branch = target_branch
+        self.start_pending_analyses()
+
+    def start_pending_analyses(self):
+        # Keep up to max_parallel_analyses analyzers running at once
+        while self.pending_branches and len(self.active_analyzers) < self.max_parallel_analyses:
+            source_branch = self.pending_branches.pop(0)
+
+            analyzer_class = ANALYZERS[self.analysis_backend]
+            analyzer = analyzer_class(
+                self.github_session,
+                self.gemini_api_key,
+                self.current_repo['full_name'],
+                source_branch,
+                self.analysis_target_branch,
+                per_file_analysis=self.per_file_analysis,
+                patch_first=self.patch_first
+            )
+            analyzer.progress_update.connect(
+                lambda message, branch=source_branch: self.update_progress(f"[{branch}] {message}")
+            )
+            analyzer.analysis_chunk.connect(self.on_analysis_chunk)
+            analyzer.analysis_completed.connect(self.on_branch_analysis_complete)
+            analyzer.error_occurred.connect(
+                lambda error, branch=source_branch: self.on_branch_analysis_error(branch, error)
+            )
+            analyzer.finished.connect(
+                lambda branch=source_branch: self.on_analyzer_finished(branch)
+            )
+            self.active_analyzers[source_branch] = analyzer
+            analyzer.start()
 
-    def analyze_next_branch(self, remaining_branches, target_branch):
-        if not remaining_branches:
-            self.show_combined_results()
-            return
+    def on_branch_analysis_complete(self, result):
+        self.current_analysis_results.append(result)
+        self.append_branch_results(result)
 
-        source_branch = remaining_branches[0]
+    def on_branch_analysis_error(self, branch, error_message):
+        # A failing branch is reported in place and does not stop the rest of the batch
+        self.analysis_errors.append((branch, error_message))
+        self.analysis_cursors[branch].insertText(f"Analysis failed: {error_message}")
+        self.results_tabs.show()
 
-        self.analyzer = GitHubMergeAnalyzer(
-            self.github_token,
-            self.gemini_api_key,
-            self.current_repo['full_name'],
-            source_branch,
-            target_branch
-        )
-        self.analyzer.progress_update.connect(self.update_progress)
-        self.analyzer.analysis_completed.connect(
-            lambda result: self.on_branch_analysis_complete(result, remaining_branches[1:], target_branch)
-        )
-        self.analyzer.error_occurred.connect(self.on_error)
-        self.analyzer.start()
+    def add_analysis_section(self, branch):
+        """
+        Add the heading for branch to the AI Analysis tab and keep a cursor inside
+        its section, so parallel analyses stream into their own sections.
+        """
+        self.append_text(self.ai_analysis_text, f"\n=== Analysis for {branch} ===\n\n\n\n")
+        cursor = QTextCursor(self.ai_analysis_text.document())
+        cursor.movePosition(QTextCursor.End)
+        # Step back over the blank lines that separate it from the next section
+        cursor.movePosition(QTextCursor.PreviousCharacter, QTextCursor.MoveAnchor, 2)
+        self.analysis_cursors[branch] = cursor
+
+    def on_analysis_chunk(self, branch, text):
+        self.streamed_branches.add(branch)
+        self.analysis_cursors[branch].insertText(text)
+        self.results_tabs.show()
 
-    def on_branch_analysis_complete(self, result, remaining_branches, target_branch):
-        self.current_analysis_results.append(result)
-        if remaining_branches:
-            self.analyze_next_branch(remaining_branches, target_branch)
-        else:
+    def on_analyzer_finished(self, branch):
+        analyzer = self.active_analyzers.pop(branch, None)
+        if analyzer:
+            analyzer.deleteLater()
+
+        self.start_pending_analyses()
+        if not self.active_analyzers and not self.pending_branches:
             self.show_combined_results()
+        else:
+            done = len(self.current_analysis_results) + len(self.analysis_errors)
+            total = done + len(self.active_analyzers) + len(self.pending_branches)
+            self.update_progress(f"Analyzed {done}/{total} branches...")
 
-    def show_combined_results(self):
-        self.progress_bar.hide()
-        self.progress_status.hide()
-        self.compare_button.setEnabled(True)
+    def append_text(self, text_edit, text):
+        cursor = text_edit.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
 
+    def update_summary(self):
         # Combine results from all analyzed branches
         total_commits = sum(r['commit_count'] for r in self.current_analysis_results)
         total_additions = sum(r['total_additions'] for r in self.current_analysis_results)
         total_deletions = sum(r['total_deletions'] for r in self.current_analysis_results)
         has_conflicts = any(r['has_conflicts'] for r in self.current_analysis_results)
 
-        # Update summary
         summary = (
             f"Total Changes: {total_commits} commits, "
             f"+{total_additions} additions, "
@@ -263,69 +498,155 @@ class MainPage(QWidget):
         if has_conflicts:
             summary += "⚠️ Some merges have conflicts that need to be resolved!"
         self.diff_summary.setText(summary)
+        return has_conflicts
 
-        # Show combined diff text
-        combined_diff = ""
-        for result in self.current_analysis_results:
-            combined_diff += f"\n=== Changes in {result['source_branch']} ===\n\n"
-            combined_diff += result['diff_text']
-        
-        self.diff_text.setText(combined_diff)
+    def append_branch_results(self, result):
+        self.update_summary()
 
-        # Show all changed files
-        self.files_list.clear()
-        for result in self.current_analysis_results:
-            branch_name = result['source_branch']
-            for file in result['changed_files']:
-                item = QListWidgetItem()
-                item.setText(
-                    f"[{branch_name}] {file['filename']} "
-                    f"(+{file['additions']}, -{file['deletions']})"
-                )
-                item.setData(Qt.UserRole, {
-                    'branch': branch_name,
-                    'file': file
-                })
-                self.files_list.addItem(item)
-
-        # Combine AI analysis
-        combined_analysis = ""
-        for result in self.current_analysis_results:
-            combined_analysis += f"\n=== Analysis for {result['source_branch']} ===\n\n"
-            combined_analysis += result['ai_analysis']
-            combined_analysis += "\n\n"
-        
-        self.ai_analysis_text.setText(combined_analysis)
+        branch_name = result['source_branch']
+        self.diff_text.append_text(f"\n=== Changes in {branch_name} ===\n\n")
+        self.diff_text.append_lines(result['diff'])
+
+        for file in result['changed_files']:
+            item = QListWidgetItem()
+            item.setText(
+                f"[{branch_name}] {file['filename']} "
+                f"(+{file['additions']}, -{file['deletions']})"
+            )
+            if file.get('conflict'):
+                item.setText(f"⚠️ {item.text()} - {file['conflict']['type']} conflict")
+            item.setData(Qt.UserRole, {
+                'branch': branch_name,
+                'target': result['target_branch'],
+                'file': file,
+                'load_contents': result['load_contents']
+            })
+            self.files_list.addItem(item)
+
+        # Streamed analyses are already in place; a failure after some chunks is added below them
+        if branch_name not in self.streamed_branches:
+            self.analysis_cursors[branch_name].insertText(result['ai_analysis'])
+        elif result.get('ai_error'):
+            self.analysis_cursors[branch_name].insertText(f"\n\n{result['ai_error']}")
+
+        self.results_tabs.show()
+
+    def show_combined_results(self):
+        self.progress_bar.hide()
+        self.progress_status.hide()
+        self.compare_button.setEnabled(True)
+
+        has_conflicts = self.update_summary()
 
         # Show results and merge button
         self.results_tabs.show()
-        if not has_conflicts:
+        if self.analysis_errors:
+            failed = "\n".join(f"{branch}: {error}" for branch, error in self.analysis_errors)
+            QMessageBox.warning(self, "Analysis Incomplete", f"Some branches could not be analyzed:\n{failed}")
+        elif not has_conflicts:
             self.merge_button.show()
 
     def on_file_selected(self, item):
         data = item.data(Qt.UserRole)
-        if data and 'file' in data:
-            file_data = data['file']
-            if file_data.get('patch'):
-                diff_text = (
-                    f"Branch: {data['branch']}\n"
-                    f"File: {file_data['filename']} ({file_data['status']})\n"
-                    f"Changes: +{file_data['additions']}, -{file_data['deletions']}\n\n"
-                    f"{file_data['patch']}"
+        if data and 'file' in data and data['file']['diff'].has_patch():
+            self.selected_file = data
+            self.show_file(data)
+            self.results_tabs.setCurrentWidget(self.diff_widget)
+            # Patch-first analyses leave the contents out until a file is opened
+            if data['file'].get('source_content') is None:
+                self.content_loader = ContentLoader(data['load_contents'], [data['file']])
+                self.content_loader.setParent(self)
+                self.content_loader.finished.connect(self.content_loader.deleteLater)
+                self.content_loader.contents_loaded.connect(self.on_file_contents_loaded)
+                self.content_loader.error_occurred.connect(self.on_file_contents_error)
+                self.content_loader.start()
+
+    def show_file(self, data):
+        file_data = data['file']
+        diff_file = file_data['diff']
+        diff_text = (
+            f"Branch: {data['branch']}\n"
+            f"File: {file_data['filename']} ({file_data['status']})\n"
+            f"Changes: +{file_data['additions']}, -{file_data['deletions']}\n"
+        )
+        if file_data.get('skip_reason'):
+            diff_text += f"Contents: {file_data['skip_reason']}\n"
+        conflict = file_data.get('conflict')
+        if conflict:
+            diff_text += f"Conflict: {conflict['type']}\n"
+            for region in conflict['regions']:
+                diff_text += (
+                    f"  {data['branch']} lines {region['source'][0]}-{region['source'][1]} clash with "
+                    f"target lines {region['target'][0]}-{region['target'][1]} "
+                    f"(merge base lines {region['base'][0]}-{region['base'][1]})\n"
                 )
-                self.diff_text.setText(diff_text)
-                self.results_tabs.setCurrentWidget(self.diff_widget)
+        # The patch lines are shown straight from the branch's diff model
+        self.diff_text.set_text(diff_text + "\n")
+        self.diff_text.append_lines(diff_file.model, diff_file.patch_line, diff_file.end_line)
+
+        if file_data.get('source_content') is None:
+            self.diff_text.append_text("\n=== Loading full contents... ===\n")
+        elif file_data.get('skip_reason') != BINARY:
+            self.diff_text.append_text(f"\n=== Current content in {data['branch']} ===\n\n")
+            self.diff_text.append_text(file_data['source_content'].text(), classify=False)
+            self.diff_text.append_text(f"\n=== Content to be merged from {data['target']} ===\n\n")
+            self.diff_text.append_text(file_data['target_content'].text(), classify=False)
+
+    def on_file_contents_loaded(self, files):
+        # Another file may have been opened in the meantime
+        if self.sender() is self.content_loader:
+            self.show_file(self.selected_file)
+
+    def on_file_contents_error(self, error_message):
+        if self.sender() is self.content_loader:
+            self.diff_text.append_text(f"\n=== Contents unavailable: {error_message} ===\n")
+
+    def check_conflict_matrix(self):
+        source_branches = self.selected_source_branches()
+        target_branch = self.target_branch_combo.currentText()
+        if not source_branches:
+            QMessageBox.warning(self, "Invalid Selection", "Please select at least one source branch")
+            return
+        if target_branch in source_branches:
+            QMessageBox.warning(self, "Invalid Selection", "Target branch cannot be in source branches")
+            return
+
+        self.progress_bar.show()
+        self.progress_status.show()
+        self.progress_status.setText("Building conflict matrix...")
+        self.matrix_button.setEnabled(False)
+
+        self.matrix_builder = ConflictMatrixBuilder(
+            self.github_session,
+            self.current_repo['full_name'],
+            source_branches,
+            target_branch
+        )
+        self.matrix_builder.progress_update.connect(self.update_progress)
+        self.matrix_builder.matrix_completed.connect(self.on_conflict_matrix_complete)
+        self.matrix_builder.error_occurred.connect(self.on_conflict_matrix_error)
+        self.matrix_builder.start()
+
+    def on_conflict_matrix_complete(self, result):
+        self.progress_bar.hide()
+        self.progress_status.hide()
+        self.matrix_button.setEnabled(True)
+        ConflictMatrixDialog(self, result).exec_()
+
+    def on_conflict_matrix_error(self, error_message):
+        self.matrix_button.setEnabled(True)
+        self.on_error(error_message)
 
     def execute_merge(self):
-        selected_items = self.source_branches_list.selectedItems()
-        if not selected_items:
+        source_branches = self.selected_source_branches()
+        if not source_branches:
             QMessageBox.warning(self, "Invalid Selection", "Please select at least one source branch")
             return
 
         dialog = MergeDialog(
             self,
             self.current_repo['full_name'],
-            [item.text() for item in selected_items],
+            source_branches,
             self.target_branch_combo.currentText()
         )
 
@@ -336,11 +657,12 @@ class MainPage(QWidget):
             self.merge_button.setEnabled(False)
 
             self.merger = GitHubMergeExecutor(
-                self.github_token,
+                self.github_session,
                 self.current_repo['full_name'],
-                selected_items,
+                source_branches,
                 self.target_branch_combo.currentText(),
-                dialog.get_commit_message()
+                dialog.get_commit_message(),
+                dialog.get_merge_method()
             )
             self.merger.progress_update.connect(self.update_progress)
             self.merger.merge_completed.connect(self.on_merge_complete)
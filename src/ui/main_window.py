@@ -1,6 +1,5 @@
 from PyQt5.QtWidgets import QMainWindow, QStackedWidget, QMessageBox
 from src.ui.setup_page import SetupPage
-from src.ui.main_page import MainPage
 
 class MainWindow(QMainWindow):
     def __init__(self, config_manager):
@@ -21,8 +20,15 @@ class MainWindow(QMainWindow):
 
     def on_setup_complete(self, github_token, gemini_api_key):
         try:
+            # Imported only now so the setup page shows without loading PyGithub and every service
+            from src.ui.main_page import MainPage
+            from src.services.github_session import get_github_session
+
+            # One pooled GitHub session is shared by every service from here on
+            self.github_session = get_github_session(github_token)
+
             # Create and show main page
-            self.main_page = MainPage(github_token, gemini_api_key)
+            self.main_page = MainPage(self.github_session, gemini_api_key, **self.config_manager.options)
             self.stacked_widget.addWidget(self.main_page)
             self.stacked_widget.setCurrentWidget(self.main_page)
         except Exception as e:
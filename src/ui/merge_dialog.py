@@ -1,6 +1,6 @@
 # File: /github-merge-assistant/github-merge-assistant/src/ui/merge_dialog.py
 
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTextEdit, QPushButton, QHBoxLayout, QFrame
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTextEdit, QPushButton, QHBoxLayout, QFrame, QCheckBox
 
 class MergeDialog(QDialog):
     def __init__(self, parent=None, repo_name="", source_branches=None, target_branch=""):
@@ -35,6 +35,13 @@ class MergeDialog(QDialog):
         self.commit_message.setMaximumHeight(100)
         layout.addWidget(self.commit_message)
 
+        # Batched mode, only meaningful for several branches
+        self.octopus_check = QCheckBox("Land all branches with a single merge commit (one CI run)")
+        # Opt-in: an octopus merge fails as a whole if any branch conflicts
+        self.octopus_check.setChecked(False)
+        self.octopus_check.setVisible(bool(source_branches) and len(source_branches) > 1)
+        layout.addWidget(self.octopus_check)
+
         # Buttons
         button_layout = QHBoxLayout()
         self.cancel_button = QPushButton("Cancel")
@@ -51,4 +58,7 @@ class MergeDialog(QDialog):
         self.setLayout(layout)
 
     def get_commit_message(self):
-        return self.commit_message.toPlainText()
\ No newline at end of file
+        return self.commit_message.toPlainText()
+
+    def get_merge_method(self):
+        return 'octopus' if self.octopus_check.isChecked() else 'merge'
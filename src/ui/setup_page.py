@@ -5,7 +5,6 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt, pyqtSignal
-from src.utils.api_tester import APITester
 
 class SetupPage(QWidget):
     setup_completed = pyqtSignal(str, str)
@@ -65,6 +64,33 @@ class SetupPage(QWidget):
         form_group.setLayout(form_layout)
         main_layout.addWidget(form_group)
 
+        options = self.config_manager.options
+        options_group = QGroupBox("Analysis Options")
+        options_layout = QVBoxLayout()
+
+        self.graphql_check = QCheckBox("Load branches through GraphQL (fewer requests on large repositories)")
+        self.graphql_check.setChecked(options['branch_backend'] == 'graphql')
+        options_layout.addWidget(self.graphql_check)
+
+        self.mirror_check = QCheckBox("Analyze from a local mirror of the repository (clones it once)")
+        self.mirror_check.setChecked(options['analysis_backend'] == 'mirror')
+        options_layout.addWidget(self.mirror_check)
+
+        self.ahead_behind_check = QCheckBox("Show ahead/behind counts in the branch list (uses the local mirror)")
+        self.ahead_behind_check.setChecked(options['ahead_behind'])
+        options_layout.addWidget(self.ahead_behind_check)
+
+        self.per_file_check = QCheckBox("Analyze every changed file separately (findings are cached)")
+        self.per_file_check.setChecked(options['per_file_analysis'])
+        options_layout.addWidget(self.per_file_check)
+
+        self.patch_first_check = QCheckBox("Send only patches to the AI, fetch full files on demand")
+        self.patch_first_check.setChecked(options['patch_first'])
+        options_layout.addWidget(self.patch_first_check)
+
+        options_group.setLayout(options_layout)
+        main_layout.addWidget(options_group)
+
         self.status_label = QLabel("")
         self.status_label.setAlignment(Qt.AlignCenter)
         main_layout.addWidget(self.status_label)
@@ -119,6 +145,9 @@ class SetupPage(QWidget):
         self.progress_bar.show()
         self.test_button.setEnabled(False)
 
+        # Imported on first test, it pulls in the GitHub client
+        from src.utils.api_tester import APITester
+
         # Create and start the API tester thread
         self.tester = APITester(self.github_token, self.gemini_api_key)
         self.tester.test_finished.connect(self.on_test_complete)
@@ -143,7 +172,19 @@ class SetupPage(QWidget):
             self.tester.deleteLater()
             self.tester = None
 
+    def get_options(self):
+        return {
+            'branch_backend': 'graphql' if self.graphql_check.isChecked() else 'rest',
+            'analysis_backend': 'mirror' if self.mirror_check.isChecked() else 'github',
+            'ahead_behind': self.ahead_behind_check.isChecked(),
+            'per_file_analysis': self.per_file_check.isChecked(),
+            'patch_first': self.patch_first_check.isChecked()
+        }
+
     def continue_setup(self):
+        # Options hold no secrets and are always kept
+        self.config_manager.save_options(self.get_options())
+
         # Save configuration if requested
         if self.save_creds.isChecked():
             self.config_manager.save_config(  # Note: changed from save_credentials to save_config
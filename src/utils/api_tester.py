@@ -1,6 +1,5 @@
 from PyQt5.QtCore import QThread, pyqtSignal
-from github import Github
-import google.generativeai as genai
+from src.services.github_session import get_github_session
 
 class APITester(QThread):
     test_finished = pyqtSignal(bool, str, str)
@@ -29,7 +28,8 @@ class APITester(QThread):
 
     def test_github_token(self):
         try:
-            g = Github(self.github_token)
+            # The session is kept and reused by the main page once setup completes
+            g = get_github_session(self.github_token).github
             # Test authentication explicitly
             user = g.get_user()
             # Force a request to verify credentials
@@ -42,6 +42,7 @@ class APITester(QThread):
 
     def test_gemini_api(self):
         try:
+            import google.generativeai as genai
             genai.configure(api_key=self.gemini_api_key)
             # Update model to gemini-2.0-flash
             model = genai.GenerativeModel('gemini-1.5-flash-latest')
@@ -0,0 +1,92 @@
+"""
+Cold-start benchmark for the GUI.
+
+Starts a fresh interpreter for every run and measures how long importing the
+window module takes and how long it takes until the first window is shown.
+It also checks that no heavy module is loaded before the setup page is up.
+Exits with status 1 when the median of a measurement is over budget or a
+heavy module was loaded, so it can run in CI:
+
+    QT_QPA_PLATFORM=offscreen python -m src.utils.startup_benchmark
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Budgets for the median run (seconds)
+IMPORT_BUDGET = 0.5
+FIRST_WINDOW_BUDGET = 1.0
+# Modules that must not be imported before the first window is shown
+DEFERRED_MODULES = ('google.generativeai', 'github', 'src.ui.main_page', 'src.services.merge_analysis')
+DEFAULT_RUNS = 5
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Runs in the child interpreter, prints one JSON line
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
+from src.ui.main_window import MainWindow
+from src.config.config_manager import ConfigManager
+imported = time.perf_counter()
+
+app = QApplication(sys.argv)
+window = MainWindow(ConfigManager())
+window.show()
+
+def shown():
+    print(json.dumps({
+        'import': imported - started,
+        'first_window': time.perf_counter() - started,
+        'deferred_loaded': [name for name in DEFERRED if name in sys.modules]
+    }))
+    app.quit()
+
+# Fires once the event loop has processed the show and first paint events
+QTimer.singleShot(0, shown)
+app.exec_()
+"""
+
+def measure_once():
+    code = f"DEFERRED = {DEFERRED_MODULES!r}\n{PROBE}"
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run(runs=DEFAULT_RUNS):
+    """Measure runs cold starts and return the report dict"""
+    samples = [measure_once() for _ in range(runs)]
+    import_time = statistics.median(sample['import'] for sample in samples)
+    first_window = statistics.median(sample['first_window'] for sample in samples)
+    deferred_loaded = sorted({name for sample in samples for name in sample['deferred_loaded']})
+    return {
+        'runs': runs,
+        'import': round(import_time, 3),
+        'first_window': round(first_window, 3),
+        'deferred_loaded': deferred_loaded,
+        'ok': import_time <= IMPORT_BUDGET and first_window <= FIRST_WINDOW_BUDGET and not deferred_loaded
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure GUI cold-start time")
+    parser.add_argument('-n', '--runs', type=int, default=DEFAULT_RUNS, help="cold starts to measure")
+    args = parser.parse_args(argv)
+
+    report = run(max(1, args.runs))
+    print(json.dumps(report))
+    if not report['ok']:
+        print(
+            f"Startup over budget (import {IMPORT_BUDGET}s, first window {FIRST_WINDOW_BUDGET}s) "
+            f"or heavy modules loaded early: {', '.join(report['deferred_loaded']) or 'none'}",
+            file=sys.stderr
+        )
+    return 0 if report['ok'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import os
+import subprocess
+
+import pytest
+
+from src.services.local_mirror import LocalMirror
+
+class Repo:
+    """Throwaway local repository standing in for the GitHub remote"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        os.makedirs(self.path)
+        self.git('init', '--quiet', '--initial-branch', 'main')
+        self.git('config', 'user.name', 'Test')
+        self.git('config', 'user.email', 'test@example.com')
+        self.git('config', 'commit.gpgsign', 'false')
+
+    def git(self, *args, check=True):
+        return subprocess.run(
+            ['git', '-C', self.path] + list(args), check=check, capture_output=True, text=True
+        ).stdout.strip()
+
+    def commit(self, files=None, message="change", parents=None):
+        """
+        Commit files ({path: text, or None to delete}) on top of the checked
+        out branch and return the new commit's SHA
+        """
+        for path, text in (files or {}).items():
+            full_path = os.path.join(self.path, path)
+            if text is None:
+                self.git('rm', '--quiet', path)
+                continue
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'w') as f:
+                f.write(text)
+            self.git('add', path)
+        self.git('commit', '--quiet', '--allow-empty', '-m', message)
+        return self.git('rev-parse', 'HEAD')
+
+    def branch(self, name, start='HEAD'):
+        self.git('checkout', '--quiet', '-B', name, start)
+
+@pytest.fixture
+def repo(tmp_path):
+    return Repo(tmp_path / 'remote')
+
+@pytest.fixture
+def mirror(tmp_path, repo):
+    """A LocalMirror of repo, created on the first update()"""
+    return LocalMirror('owner/repo', mirror_dir=str(tmp_path / 'mirrors'), remote_url=repo.path)
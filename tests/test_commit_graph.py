@@ -0,0 +1,62 @@
+import random
+from itertools import combinations
+
+from src.services.commit_graph import CommitGraph
+
+EMPTY_TREE_SHA = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+def random_history(repo, count, seed):
+    """Commit a random DAG of count commits with merges and a branch per commit"""
+    rng = random.Random(seed)
+    roots = 2
+    shas = []
+    for index in range(count):
+        parents = []
+        if index >= roots:
+            parents = rng.sample(shas, rng.choice((1, 1, 1, 2, 3)) if len(shas) > 2 else 1)
+        args = ['commit-tree', EMPTY_TREE_SHA, '-m', f"commit {index}"]
+        for parent in parents:
+            args += ['-p', parent]
+        sha = repo.git(*args)
+        repo.git('update-ref', f"refs/heads/b{index}", sha)
+        shas.append(sha)
+    return shas
+
+def test_matches_git_on_random_history(repo, mirror):
+    shas = random_history(repo, 40, seed=7)
+    mirror.update(max_age=0)
+
+    graph = CommitGraph()
+    # Index in two steps, the second reading only the commits not seen yet
+    assert graph.update_from_mirror(mirror, shas[:20]) == 20
+    assert graph.update_from_mirror(mirror, shas) == 20
+    assert len(graph) == 40
+
+    for first, second in combinations(shas, 2):
+        counts = repo.git('rev-list', '--left-right', '--count', f"{first}...{second}").split()
+        assert graph.ahead_behind(first, second) == (int(counts[0]), int(counts[1]))
+
+        # Unrelated histories have no merge base, git then exits with 1
+        bases = repo.git('merge-base', '--all', first, second, check=False).split()
+        merge_base = graph.merge_base(first, second)
+        if bases:
+            assert merge_base in bases
+        else:
+            assert merge_base is None
+
+def test_linear_history(repo, mirror):
+    base = repo.commit(message="base")
+    repo.branch('feature')
+    heads = [repo.commit(message=f"feature {i}") for i in range(3)]
+    repo.git('checkout', '--quiet', 'main')
+    main = repo.commit(message="main")
+    mirror.update(max_age=0)
+
+    graph = CommitGraph()
+    graph.update_from_mirror(mirror, [heads[-1], main])
+
+    assert graph.ahead_behind(heads[-1], main) == (3, 1)
+    assert graph.ahead_behind(heads[0], heads[-1]) == (0, 2)
+    assert graph.merge_base(heads[-1], main) == base
+    assert graph.merge_base(heads[0], heads[-1]) == heads[0]
+    assert graph.update_from_mirror(mirror, [heads[-1]]) == 0
@@ -0,0 +1,164 @@
+import random
+
+from src.services.conflict_detector import ConflictDetector, _matches, merge_lines, sync_regions
+
+def lines(text):
+    return text.split()
+
+def test_merge_lines_takes_changes_from_both_sides():
+    base = lines("a b c d e f g")
+    ours = lines("A b c d e f g")
+    theirs = lines("a b c d e f G")
+
+    merged, conflicts = merge_lines(base, ours, theirs)
+
+    assert merged == lines("A b c d e f G")
+    assert conflicts == []
+
+def test_merge_lines_reports_overlapping_changes():
+    base = lines("a b c d e")
+    ours = lines("a b X d e")
+    theirs = lines("a b Y Y d e")
+
+    merged, conflicts = merge_lines(base, ours, theirs)
+
+    # Conflicting hunks keep our side
+    assert merged == lines("a b X d e")
+    assert conflicts == [{'base': (3, 3), 'target': (3, 3), 'source': (3, 4)}]
+
+def test_merge_lines_same_change_on_both_sides_is_clean():
+    base = lines("a b c")
+    changed = lines("a B c extra")
+
+    assert merge_lines(base, changed, changed) == (changed, [])
+
+def test_sync_regions_end_with_sentinel():
+    base, ours, theirs = lines("a b c"), lines("a x c"), lines("a b c d")
+
+    regions = sync_regions(base, ours, theirs)
+
+    assert regions[0] == (0, 1, 0, 1, 0, 1)
+    assert regions[-1] == (3, 3, 3, 3, 4, 4)
+
+def check_matches(base, other):
+    matches = _matches(base, other)
+    assert matches[-1] == (len(base), len(other), 0)
+    base_end = other_end = 0
+    for base_start, other_start, length in matches[:-1]:
+        assert length > 0 and base_start >= base_end and other_start >= other_end
+        assert base[base_start:base_start + length] == other[other_start:other_start + length]
+        base_end, other_end = base_start + length, other_start + length
+    return matches
+
+def mutate(rng, items):
+    items = list(items)
+    for _ in range(rng.randint(0, 5)):
+        position = rng.randint(0, len(items))
+        if rng.random() < 0.5:
+            items.insert(position, rng.choice("abxyz{}"))
+        elif position < len(items):
+            del items[position]
+    return items
+
+def test_random_merges_keep_one_sided_changes():
+    rng = random.Random(3)
+    for _ in range(500):
+        base = [rng.choice("abcde{}") for _ in range(rng.randint(0, 30))]
+        ours, theirs = mutate(rng, base), mutate(rng, base)
+        check_matches(base, ours)
+        check_matches(base, theirs)
+
+        merged, conflicts = merge_lines(base, ours, theirs)
+        if ours == base:
+            assert (merged, conflicts) == (theirs, [])
+        if theirs == base or theirs == ours:
+            assert (merged, conflicts) == (ours, [])
+
+def test_repeated_lines_merge_cleanly():
+    # Braces and blank lines everywhere, with no line unique to both sides
+    rng = random.Random(5)
+    base = [rng.choice(["{", "}", "", "    return", "x"]) for _ in range(10000)]
+    ours, theirs = list(base), list(base)
+    for index in range(0, 10000, 1000):
+        ours[index] = f"ours {index}"
+        theirs[index + 500] = f"theirs {index}"
+
+    merged, conflicts = merge_lines(base, ours, theirs)
+
+    assert conflicts == []
+    assert [line for line in merged if line.startswith(("ours", "theirs"))] == [
+        f"{side} {index}" for index in range(0, 10000, 1000) for side in ("ours", "theirs")
+    ]
+
+def test_detector_on_mirror(repo, mirror):
+    repo.commit({
+        'clean.txt': "a\nb\nc\nd\ne\n",
+        'conflict.txt': "a\nb\nc\n",
+        'deleted.txt': "keep\n",
+        'binary.bin': "a\0b\n",
+        'untouched.txt': "same\n"
+    })
+    repo.branch('feature')
+    repo.commit({
+        'clean.txt': "A\nb\nc\nd\ne\n",
+        'conflict.txt': "a\nsource\nc\n",
+        'deleted.txt': "changed\n",
+        'binary.bin': "a\0source\n",
+        'added.txt': "source\n"
+    })
+    repo.git('checkout', '--quiet', 'main')
+    repo.commit({
+        'clean.txt': "a\nb\nc\nd\nE\n",
+        'conflict.txt': "a\ntarget\nc\n",
+        'deleted.txt': None,
+        'binary.bin': "a\0target\n",
+        'added.txt': "target\n"
+    })
+    mirror.update(max_age=0)
+
+    sizes = {}
+    base = mirror.merge_base('main', 'feature')
+    trees = [mirror.tree_blobs(commit, sizes) for commit in (base, 'main', 'feature')]
+    _, files = mirror.compare('main', 'feature')
+    reads = []
+
+    def read_blobs(shas):
+        reads.append(len(shas))
+        return mirror.read_blobs(shas)
+
+    conflicts = ConflictDetector(read_blobs, sizes).detect(files, *trees)
+
+    assert conflicts == {
+        'conflict.txt': {'type': 'content', 'regions': [{'base': (2, 2), 'target': (2, 2), 'source': (2, 2)}]},
+        'deleted.txt': {'type': 'modify/delete', 'regions': []},
+        'binary.bin': {'type': 'binary', 'regions': []},
+        'added.txt': {'type': 'content', 'regions': [{'base': (1, 0), 'target': (1, 1), 'source': (1, 1)}]}
+    }
+    # Only files changed on both sides are read, all in one batch here
+    assert reads == [11]
+
+def test_detector_reads_in_batches(monkeypatch):
+    import src.services.conflict_detector as conflict_detector
+    monkeypatch.setattr(conflict_detector, 'MERGE_BATCH_BYTES', 100)
+    blobs = {}
+    files = []
+    trees = ({}, {}, {})
+    for index in range(5):
+        path = f"f{index}"
+        for tree, text in zip(trees, ("base\n", "target\n", "source\n")):
+            sha = f"{text.strip()}{index}"
+            blobs[sha] = text.encode() * 10
+            tree[path] = sha
+        files.append({'filename': path})
+    reads = []
+
+    def read_blobs(shas):
+        reads.append(sorted(shas))
+        return {sha: blobs[sha] for sha in shas}
+
+    sizes = {sha: len(data) for sha, data in blobs.items()}
+    conflicts = ConflictDetector(read_blobs, sizes).detect(files, *trees)
+
+    assert sorted(conflicts) == [f"f{index}" for index in range(5)]
+    # Every file's three blobs are over the batch size, so each is read on its own
+    assert len(reads) == 5 and all(len(shas) == 3 for shas in reads)
@@ -0,0 +1,79 @@
+import threading
+
+from src.services.content_store import ContentStore
+
+def chunked(data, size):
+    return (data[start:start + size] for start in range(0, len(data), size))
+
+def test_put_and_read():
+    store = ContentStore()
+    first = store.put(b"first")
+    second = store.put_text("second ✓", key='sha')
+
+    assert first.read() == b"first"
+    assert second.text() == "second ✓"
+    assert store.put(b"other", key='sha') is second
+    assert store.get('sha') is second
+    assert store.put(b"").read() == b""
+
+def test_put_chunks_is_readable_after_the_range_was_mapped():
+    store = ContentStore()
+    first = store.put(b"first")
+
+    def chunks():
+        # Reading now maps the range reserved for these chunks before they are written
+        assert first.read() == b"first"
+        yield from chunked(b"abc" * 1000, 7)
+
+    second = store.put_chunks(chunks(), 5000)
+
+    assert second.read() == b"abc" * 1000
+
+def test_put_chunks_stops_at_length():
+    store = ContentStore()
+    handle = store.put_chunks(chunked(bytes(range(256)) * 10, 100), 1000)
+
+    assert len(handle) == 1000
+    assert handle.read() == (bytes(range(256)) * 10)[:1000]
+
+def test_growing_range_in_place():
+    store = ContentStore()
+    data = bytes(range(256)) * 1000
+    handle = store.put_chunks(chunked(data, 1000), 10 ** 6, reserve=4096)
+
+    assert handle.read() == data
+    # The last range grows where it is, doubling, without leaving a copy behind
+    assert store.size == 262144
+
+def test_growing_range_moves_past_other_writes():
+    store = ContentStore()
+    data = bytes(range(256)) * 100
+    others = []
+
+    def chunks():
+        for chunk in chunked(data, 1000):
+            # Another content lands behind the range before every chunk
+            others.append(store.put(b"other"))
+            yield chunk
+
+    handle = store.put_chunks(chunks(), 10 ** 6, reserve=1000)
+
+    assert handle.read() == data
+    assert all(other.read() == b"other" for other in others)
+
+def test_concurrent_streams():
+    store = ContentStore()
+    handles = {}
+
+    def stream(index):
+        data = bytes([index]) * (10000 + index)
+        handles[index] = (store.put_chunks(chunked(data, 333), 10 ** 6, reserve=512), data)
+
+    threads = [threading.Thread(target=stream, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for handle, data in handles.values():
+        assert handle.read() == data
@@ -0,0 +1,61 @@
+from src.services.diff_model import (
+    ADDED, HUNK_HEADER, PLAIN, REMOVED, SECTION_HEADER, DiffModel, LineBuffer, classify_line
+)
+
+PATCH = "@@ -1,3 +1,3 @@ def main():\n context\n-old\n+new\n@@ -10 +10,2 @@\n+one\n+two"
+
+def changed_file(filename, patch, status='modified'):
+    return {'filename': filename, 'status': status, 'additions': 1, 'deletions': 1, 'patch': patch}
+
+def test_classify_line():
+    assert classify_line("@@ -1 +1 @@") == HUNK_HEADER
+    assert classify_line("@@ not a header") == PLAIN
+    assert classify_line("+added") == ADDED
+    assert classify_line("-removed") == REMOVED
+    assert classify_line("=== section ===") == SECTION_HEADER
+    assert classify_line(" context") == PLAIN
+
+def test_line_buffer_indexes_lines():
+    buffer = LineBuffer("a\n+bb\n\n-c\n")
+
+    assert buffer.line_count() == 4
+    assert [buffer.line(i) for i in range(4)] == ["a", "+bb", "", "-c"]
+    assert list(buffer.kinds) == [PLAIN, ADDED, PLAIN, REMOVED]
+    assert buffer.widest == 3
+    assert buffer.span(1, 4) == "+bb\n\n-c"
+    assert buffer.span(2, 2) == ""
+
+def test_line_buffer_without_trailing_newline_or_classification():
+    buffer = LineBuffer("+x\n-y", classify=False)
+
+    assert buffer.line(1) == "-y"
+    assert buffer.span(0, 2) == "+x\n-y"
+    assert list(buffer.kinds) == [PLAIN, PLAIN]
+    assert LineBuffer("").line_count() == 0
+
+def test_diff_model_files_and_hunks():
+    files = [
+        changed_file('a.py', PATCH),
+        changed_file('image.png', None, status='added'),
+        changed_file('b.py', "@@ -1 +1 @@\n-x\n+y\n")
+    ]
+    model = DiffModel(files)
+
+    first, binary, second = model.files
+    assert [f['diff'] for f in files] == model.files
+    assert all('patch' not in f for f in files)
+
+    assert model.line(first.first_line) == "File: a.py (modified)"
+    assert first.patch() == PATCH
+    assert [(h.old_start, h.old_count, h.new_start, h.new_count) for h in first.hunks] == [(1, 3, 1, 3), (10, 1, 10, 2)]
+    assert first.hunks[0].section == "def main():"
+    assert model.span(first.hunks[1].first_line, first.hunks[1].end_line) == "@@ -10 +10,2 @@\n+one\n+two"
+
+    assert not binary.has_patch()
+    assert binary.patch() == ""
+
+    # One blank line separates the files, the trailing newline of b.py's patch is dropped
+    assert second.first_line == first.end_line + 1
+    assert second.patch() == "@@ -1 +1 @@\n-x\n+y"
+    assert model.kind(second.first_line) == SECTION_HEADER
+    assert [model.kind(i) for i in range(second.patch_line, second.end_line)] == [HUNK_HEADER, REMOVED, ADDED]
@@ -0,0 +1,122 @@
+import base64
+import subprocess
+
+from src.services.local_mirror import LocalMirror
+
+def test_update_clones_branches_only(repo, mirror):
+    repo.commit({'a.txt': "a\n"})
+    repo.git('update-ref', 'refs/pull/1/head', 'HEAD')
+
+    mirror.update(max_age=0)
+
+    refs = mirror.git('for-each-ref', '--format=%(refname)').decode().split()
+    assert refs == ['refs/heads/main']
+
+def test_update_fetches_new_commits_and_prunes(repo, mirror):
+    repo.commit({'a.txt': "a\n"})
+    repo.branch('feature')
+    repo.commit({'b.txt': "b\n"})
+    mirror.update(max_age=0)
+
+    head = repo.commit({'b.txt': "b2\n"})
+    mirror.update(max_age=0)
+    assert mirror.resolve('feature') == head
+
+    repo.git('checkout', '--quiet', 'main')
+    repo.git('branch', '-D', 'feature')
+    repo.branch('other')
+    mirror.update(max_age=0)
+
+    refs = mirror.git('for-each-ref', '--format=%(refname:short)').decode().split()
+    assert sorted(refs) == ['main', 'other']
+    assert mirror.resolve('other') == repo.git('rev-parse', 'main')
+
+def test_compare_reports_files_like_github(repo, mirror):
+    repo.commit({
+        'kept.txt': "".join(f"line {i}\n" for i in range(20)),
+        'removed.txt': "gone\n",
+        'old_name.txt': "".join(f"moved {i}\n" for i in range(10))
+    })
+    repo.branch('feature')
+    repo.commit({
+        'kept.txt': "".join(f"line {i}\n" if i != 10 else "changed\n" for i in range(20)),
+        'removed.txt': None,
+        'old_name.txt': None,
+        'new_name.txt': "".join(f"moved {i}\n" for i in range(10)),
+        'added.txt': "new\nfile\n"
+    })
+    # Commits on main after the fork are not part of the three-dot compare
+    repo.git('checkout', '--quiet', 'main')
+    repo.commit({'main_only.txt': "main\n"})
+    mirror.update(max_age=0)
+
+    merge_base, files = mirror.compare(mirror.resolve('main'), mirror.resolve('feature'))
+
+    assert merge_base == repo.git('merge-base', 'main', 'feature')
+    by_name = {file['filename']: file for file in files}
+    assert set(by_name) == {'kept.txt', 'removed.txt', 'new_name.txt', 'added.txt'}
+    assert by_name['kept.txt']['status'] == 'modified'
+    assert (by_name['kept.txt']['additions'], by_name['kept.txt']['deletions']) == (1, 1)
+    assert by_name['removed.txt']['status'] == 'removed'
+    assert by_name['new_name.txt']['status'] == 'renamed'
+    assert by_name['new_name.txt']['previous_filename'] == 'old_name.txt'
+    assert by_name['added.txt']['status'] == 'added'
+    assert by_name['added.txt']['changes'] == 2
+
+    patch = by_name['kept.txt']['patch']
+    assert patch.startswith("@@ -8,7 +8,7 @@")
+    assert "-line 10\n+changed" in patch
+
+def test_compare_context_lines(repo, mirror):
+    repo.commit({'a.txt': "".join(f"{i}\n" for i in range(40))})
+    repo.branch('feature')
+    repo.commit({'a.txt': "".join(f"{i}\n" if i != 20 else "x\n" for i in range(40))})
+    mirror.update(max_age=0)
+
+    _, files = mirror.compare('main', 'feature', context_lines=10)
+
+    assert files[0]['patch'].startswith("@@ -11,21 +11,21 @@")
+
+def test_tree_and_blob_reads(repo, mirror):
+    head = repo.commit({'a.txt': "alpha\n", 'dir/b.bin': "b\0inary"})
+    mirror.update(max_age=0)
+
+    sizes = {}
+    tree = mirror.tree_blobs(head, sizes)
+
+    assert set(tree) == {'a.txt', 'dir/b.bin'}
+    assert sizes[tree['a.txt']] == 6
+    blobs = mirror.read_blobs([tree['a.txt'], tree['dir/b.bin'], tree['a.txt'], None])
+    assert blobs == {tree['a.txt']: b"alpha\n", tree['dir/b.bin']: b"b\0inary"}
+    assert mirror.read_blob_head(tree['a.txt'], 3) == b"alp"
+
+def test_changed_blobs(repo, mirror):
+    base = repo.commit({'a.txt': "a\n", 'b.txt': "b\n"})
+    head = repo.commit({'a.txt': "a2\n", 'b.txt': None, 'c.txt': "c\n"})
+    mirror.update(max_age=0)
+
+    base_tree, head_tree = mirror.tree_blobs(base), mirror.tree_blobs(head)
+    assert mirror.changed_blobs(base, head) == {
+        'a.txt': (base_tree['a.txt'], head_tree['a.txt']),
+        'b.txt': (base_tree['b.txt'], None),
+        'c.txt': (None, head_tree['c.txt'])
+    }
+
+def test_token_stays_off_the_command_line(tmp_path, monkeypatch):
+    calls = []
+
+    def run(command, **kwargs):
+        calls.append((command, kwargs.get('env') or {}))
+        return subprocess.CompletedProcess(command, 0, b"", b"")
+
+    monkeypatch.setattr(subprocess, 'run', run)
+    mirror = LocalMirror('owner/repo', github_token='secret', mirror_dir=str(tmp_path))
+    mirror.update(max_age=0)
+
+    command, env = calls[0]
+    assert command[:3] == ['git', 'clone', '--bare']
+    assert not any('secret' in arg or 'Authorization' in arg for arg in command)
+    count = int(env['GIT_CONFIG_COUNT'])
+    assert env[f'GIT_CONFIG_KEY_{count - 1}'] == 'http.extraHeader'
+    credentials = env[f'GIT_CONFIG_VALUE_{count - 1}'].split()[-1]
+    assert base64.b64decode(credentials) == b"x-access-token:secret"
@@ -0,0 +1,60 @@
+from src.services.tree_merge import TreeMerger, git_blob_sha, tree_changes
+
+def entries(mirror, commit):
+    """The tree of commit as {path: (mode, sha)}, the form TreeMerger works on"""
+    tree = {}
+    for line in mirror.git('ls-tree', '-r', commit).decode().splitlines():
+        info, path = line.split('\t', 1)
+        mode, _, sha = info.split()
+        tree[path] = (mode, sha)
+    return tree
+
+def test_git_blob_sha_matches_git(repo):
+    head = repo.commit({'a.txt': "hello\n"})
+
+    assert git_blob_sha(b"hello\n") == repo.git('rev-parse', f"{head}:a.txt")
+
+def test_octopus_merge_of_clean_and_conflicting_sources(repo, mirror):
+    base = repo.commit({'shared.txt': "1\n2\n3\n4\n5\n6\n", 'other.txt': "x\n"})
+    repo.branch('first')
+    repo.commit({'shared.txt': "one\n2\n3\n4\n5\n6\n", 'first.txt': "first\n"})
+    repo.branch('second', base)
+    repo.commit({'shared.txt': "1\n2\n3\n4\n5\nsix\n", 'other.txt': None})
+    repo.branch('clashing', base)
+    repo.commit({'shared.txt': "ONE\n2\n3\n4\n5\n6\n"})
+    repo.git('checkout', '--quiet', 'main')
+    repo.commit({'shared.txt': "1\n2\nthree\n4\n5\n6\n"})
+    mirror.update(max_age=0)
+
+    target = entries(mirror, 'main')
+    sources = [(name, entries(mirror, base), entries(mirror, name)) for name in ('first', 'second', 'clashing')]
+    merger = TreeMerger(mirror.read_blobs)
+
+    tree, merged, conflicting = merger.merge(target, sources)
+
+    assert merged == ['first', 'second']
+    # clashing edits the line first already changed
+    assert conflicting == {'clashing': ['shared.txt']}
+    assert 'other.txt' not in tree
+    assert tree['first.txt'] == entries(mirror, 'first')['first.txt']
+    mode, sha = tree['shared.txt']
+    assert mode == '100644'
+    assert merger.new_blobs[sha] == b"one\n2\nthree\n4\n5\nsix\n"
+    assert set(tree_changes(target, tree)) == {'shared.txt', 'first.txt', 'other.txt'}
+
+def test_binary_files_changed_on_both_sides_conflict(repo, mirror):
+    base = repo.commit({'data.bin': "a\0b\n"})
+    repo.branch('feature')
+    repo.commit({'data.bin': "a\0source\n"})
+    repo.git('checkout', '--quiet', 'main')
+    repo.commit({'data.bin': "a\0target\n"})
+    mirror.update(max_age=0)
+
+    merger = TreeMerger(mirror.read_blobs)
+    tree, merged, conflicting = merger.merge(
+        entries(mirror, 'main'), [('feature', entries(mirror, base), entries(mirror, 'feature'))]
+    )
+
+    assert merged == []
+    assert conflicting == {'feature': ['data.bin']}
+    assert tree == entries(mirror, 'main')